@@ -0,0 +1,23 @@
+"""
+Micro benchmarks for the validators. Run them from the root of the
+repository, e.g.::
+
+    python -m benchmarks.count_validators
+"""
+import os
+import timeit
+
+
+def setup():
+    """Configures Django with the settings of the test suite."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.example.tests.test_settings")
+    import django
+
+    django.setup()
+
+
+def report(label, statement, number=2000, repeat=5):
+    """Prints the best time per call of ``statement`` in microseconds."""
+    best = min(timeit.repeat(statement, number=number, repeat=repeat)) / number
+    print("%-50s %10.2f us" % (label, best * 1e6))
+    return best
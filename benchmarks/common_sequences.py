@@ -0,0 +1,41 @@
+"""
+Compares the common sequence validator to the fuzzy matching of the
+similarity validators it replaced.
+
+    python -m benchmarks.common_sequences
+"""
+from benchmarks import report, setup
+
+PASSWORDS = ["Chad+pher9k", "correct horse battery staple", "qwertyuiop", "a"]
+
+
+def main():
+    setup()
+    from django.core.exceptions import ValidationError
+
+    from password_policies.conf import settings
+    from password_policies.forms import validators
+
+    automaton = validators.validate_common_sequences
+
+    class FuzzySequenceValidator(validators.BaseSimilarityValidator):
+        code = automaton.code
+        message = automaton.message
+        get_needles = automaton.get_needles
+
+    sequences = [sequence.lower() for sequence in settings.PASSWORD_COMMON_SEQUENCES]
+    fuzzy = FuzzySequenceValidator(sequences + [s[::-1] for s in sequences])
+    for password in PASSWORDS:
+        for label, validator in (("fuzzy", fuzzy), ("automaton", automaton)):
+
+            def validate(validator=validator):
+                try:
+                    validator(password)
+                except ValidationError:
+                    pass
+
+            report("%-9s %r" % (label, password), validate, number=200)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the category count validators against the previous
+implementation, which called :py:func:`unicodedata.category` once per
+character and validator and searched the result in a list."""
+import unicodedata
+
+from benchmarks import report, setup
+
+PASSWORDS = {
+    "ASCII": "Chad+pher9k-Oor0ohf4bi",
+    "Latin-1": "Ch\xc4d+ph\xe9r9k-\xd6\xf6r0\xf6hf4b\xed",
+    "CJK": "中文密碼+9中文密碼-0密碼",
+}
+
+
+def legacy_count(value, categories):
+    counter = 0
+    for character in value:
+        if unicodedata.category(character) in categories:
+            counter += 1
+    return counter
+
+
+def main():
+    setup()
+    from password_policies.forms import analysis as analysis_module
+    from password_policies.forms import validators
+    from password_policies.forms.analysis import PasswordAnalysis
+
+    count_validators = [
+        validators.validate_letter_count,
+        validators.validate_lowercase_letter_count,
+        validators.validate_uppercase_letter_count,
+        validators.validate_number_count,
+        validators.validate_symbol_count,
+    ]
+    analysis_module.get_category_table()
+    for name, password in PASSWORDS.items():
+
+        def legacy():
+            for validator in count_validators:
+                legacy_count(password, validator.categories)
+
+        def table():
+            analysis = PasswordAnalysis(password)
+            for validator in count_validators:
+                analysis.count_mask(validator.get_category_mask())
+
+        analysis = PasswordAnalysis(password)
+
+        def masks():
+            for validator in count_validators:
+                analysis.count_mask(validator.get_category_mask())
+
+        before = report("%s, list membership" % name, legacy)
+        after = report("%s, category table incl. analysis" % name, table)
+        report("%s, category masks only" % name, masks)
+        print("%-50s %10.1fx" % ("%s, speedup" % name, before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compares the memory used by a list of haystacks to
+:py:class:`~password_policies.forms.dictionaries.CompactStrings`.
+
+    python -m benchmarks.haystack_memory
+"""
+import random
+import string
+import tracemalloc
+
+from benchmarks import setup
+
+
+def measure(label, factory):
+    tracemalloc.start()
+    haystacks = factory()
+    usage = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("%-50s %10.2f MB" % (label, usage / 1e6))
+    return haystacks
+
+
+def main():
+    setup()
+    from password_policies.forms.dictionaries import CompactStrings
+
+    generator = random.Random(0)
+    lines = [
+        "".join(generator.choices(string.ascii_lowercase, k=generator.randint(4, 12)))
+        + "\n"
+        for i in range(200000)
+    ]
+    measure("list of str (200k words)", lambda: [line.strip() for line in lines])
+    measure(
+        "CompactStrings (200k words)",
+        lambda: CompactStrings(line.strip() for line in lines),
+    )
+
+
+if __name__ == "__main__":
+    main()
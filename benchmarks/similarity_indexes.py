@@ -0,0 +1,54 @@
+"""
+Compares the indexes of the similarity validators to the scan of the
+haystacks of matching lengths (the ``length`` index).
+
+    python -m benchmarks.similarity_indexes
+"""
+import random
+import string
+
+from benchmarks import report, setup
+
+
+def random_word(generator):
+    length = min(max(int(generator.gauss(8, 2)), 3), 16)
+    return "".join(generator.choices(string.ascii_lowercase, k=length))
+
+
+def edit(generator, word):
+    """Returns ``word`` with a character replaced and one appended."""
+    chars = list(word)
+    chars[generator.randrange(len(chars))] = generator.choice(string.digits)
+    return "".join(chars) + generator.choice("!?1")
+
+
+def main():
+    setup()
+    from django.core.exceptions import ValidationError
+
+    from password_policies.forms.validators import BaseSimilarityValidator
+
+    class SimilarityValidator(BaseSimilarityValidator):
+        code = "similar"
+        message = "similar"
+
+    generator = random.Random(4013)
+    words = [random_word(generator) for _idx in range(20000)]
+    passwords = [random_word(generator) + "!1" for _idx in range(20)]
+    passwords += [edit(generator, generator.choice(words)) for _idx in range(20)]
+    for index in ("length", "bktree", "qgram", "numpy"):
+        validator = SimilarityValidator(words, index=index)
+        validator.load()
+
+        def validate(validator=validator):
+            for password in passwords:
+                try:
+                    validator(password)
+                except ValidationError:
+                    pass
+
+        report("%-6s 20k words, %d passwords" % (index, len(passwords)), validate, 1, 3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Compares the distance kernels of the similarity validators across
+password and haystack lengths."""
+import random
+
+from benchmarks import report, setup
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789+!"
+
+
+def random_string(generator, length):
+    return "".join(generator.choice(ALPHABET) for _idx in range(length))
+
+
+def main():
+    setup()
+    from password_policies.forms.matching import KERNELS
+
+    generator = random.Random(4013)
+    for m in (8, 16, 32, 64):
+        for n in (8, 32, 128):
+            needle = random_string(generator, m)
+            haystack = random_string(generator, n)
+            for name, kernel in KERNELS.items():
+                report(
+                    "%-5s password %2d, haystack %3d" % (name, m, n),
+                    lambda kernel=kernel: kernel(needle, haystack),
+                    number=200,
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,18 @@ PASSWORD_CHANGE_MIDDLEWARE_EXCLUDED_PATHS = getattr(
 #:
 #: Defaults to 1 hour.
 PASSWORD_CHECK_SECONDS = getattr(settings, "PASSWORD_CHECK_SECONDS", 60**2)
+#: The location of a Bloom filter of forbidden passwords,
+#: written by the ``build_password_blocklist`` management
+#: command. Passwords found in the filter are rejected.
+#:
+#: Used by the :validator:`BlocklistValidator`.
+PASSWORD_BLOCKLIST = getattr(settings, "PASSWORD_BLOCKLIST", None)
+#: The location of a list of hashes of breached passwords,
+#: written by the ``convert_password_hashes`` management
+#: command. Passwords found in the list are rejected.
+#:
+#: Used by the :validator:`BreachedPasswordValidator`.
+PASSWORD_BREACHED_HASHES = getattr(settings, "PASSWORD_BREACHED_HASHES", None)
 
 #: Specifies a list of common sequences to attempt to
 #: match a password against.
@@ -52,6 +64,16 @@ PASSWORD_COMMON_SEQUENCES = getattr(
         "qazwsxedcrfvtgbyhnujmikolp",
     ],
 )
+#: If set, passwords containing a run of at least this many
+#: characters of a common sequence (or of a reversed one)
+#: are rejected, e.g. ``4`` rejects ``MyDog1234!``. Otherwise
+#: only passwords mostly made of a run are rejected (see
+#: :py:attr:`PASSWORD_MATCH_THRESHOLD`).
+#:
+#: Used by the :validator:`CommonSequenceValidator`.
+PASSWORD_COMMON_SEQUENCES_MIN_RUN = getattr(
+    settings, "PASSWORD_COMMON_SEQUENCES_MIN_RUN", None
+)
 PASSWORD_DICTIONARY = getattr(settings, "PASSWORD_DICTIONARY", None)
 """
 Specifies the location of a dictionary (file with one
@@ -59,6 +81,73 @@ word per line). Could be "/usr/share/dict/words".
 
 Used by the :validator:`DictionaryValidator`.
 """
+#: A dictionary mapping language codes (e.g. ``"de"`` or
+#: ``"pt-br"``) to dictionary files. Passwords are compared
+#: to the dictionary of the active language (see
+#: :py:func:`django.utils.translation.get_language`) and
+#: :py:attr:`PASSWORD_WORDS`; languages without dictionary
+#: fall back to :py:attr:`PASSWORD_DICTIONARY`. Each
+#: dictionary is read on first use.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARIES = getattr(settings, "PASSWORD_DICTIONARIES", {})
+#: The maximum number of dictionaries of
+#: :py:attr:`PASSWORD_DICTIONARIES` kept in memory by each
+#: process. The least recently used are dropped.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARIES_CACHE_SIZE = getattr(
+    settings, "PASSWORD_DICTIONARIES_CACHE_SIZE", 3
+)
+#: The name of an index to build over the dictionary words
+#: to find similar words without comparing a password to
+#: every word. ``"bktree"`` builds a BK-tree of the words of
+#: each length, ``"qgram"`` an inverted index of trigrams and
+#: ``"numpy"`` compares a password to all words of a length
+#: at once (requires NumPy).
+#: ``"processes"`` compares a password to all words, split
+#: across a pool of processes (see
+#: :py:attr:`PASSWORD_DICTIONARY_PROCESSES`).
+#: All return the same results as comparing every word.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARY_INDEX = getattr(settings, "PASSWORD_DICTIONARY_INDEX", None)
+#: The location of a compiled dictionary, written by the
+#: ``compile_password_dictionary`` management command. If set,
+#: the words of :py:attr:`PASSWORD_DICTIONARY` and
+#: :py:attr:`PASSWORD_WORDS` are read from this file, which
+#: is mapped into memory and shared by all processes. It is
+#: compiled again if it is missing or out of date.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARY_COMPILED = getattr(settings, "PASSWORD_DICTIONARY_COMPILED", None)
+#: Determines wether to reject passwords which are a
+#: dictionary word once lowercased and stripped of
+#: digits and symbols (e.g. ``Dragon2024!``), before
+#: comparing them to the words. Such passwords are
+#: not always similar enough to the word to be rejected
+#: otherwise.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARY_EXACT_MATCH = getattr(
+    settings, "PASSWORD_DICTIONARY_EXACT_MATCH", True
+)
+#: If set, the dictionary files are checked for changes
+#: at most once every this many seconds, while validating
+#: passwords. Changed files are read again and their index
+#: rebuilt in a background thread, then replace the previous
+#: ones; no validation waits for it. ``None`` disables it.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARY_RELOAD_SECONDS = getattr(
+    settings, "PASSWORD_DICTIONARY_RELOAD_SECONDS", None
+)
+#: The number of processes comparing passwords to the
+#: dictionary words if :py:attr:`PASSWORD_DICTIONARY_INDEX`
+#: is ``"processes"``. Defaults to the number of CPUs.
+#:
+#: Used by the :validator:`DictionaryValidator`.
+PASSWORD_DICTIONARY_PROCESSES = getattr(settings, "PASSWORD_DICTIONARY_PROCESSES", None)
 #: A minimum distance of the difference between old and
 #: new password. A positive integer. Values greater
 #: than 1 are recommended.
@@ -100,11 +189,50 @@ PASSWORD_HISTORY_ADMIN_SEARCH_FIELDS = getattr(
 #:
 #: Defaults to 10 entries.
 PASSWORD_HISTORY_COUNT = getattr(settings, "PASSWORD_HISTORY_COUNT", 10)
+#: The keyboard layouts searched for keyboard walks, see
+#: :py:data:`password_policies.forms.keyboards.LAYOUTS`.
+#:
+#: Used by the :validator:`KeyboardWalkValidator`.
+PASSWORD_KEYBOARD_LAYOUTS = getattr(
+    settings, "PASSWORD_KEYBOARD_LAYOUTS", ["qwerty", "qwertz", "azerty", "keypad"]
+)
+#: Specifies the length from which a walk over adjacent keys
+#: (``qwert``, ``zaq1@wsx``, ``zxcvfr``) is rejected. Each
+#: change of direction which does not continue a zigzag
+#: counts as one key less.
+#:
+#: A value of None disables keyboard walk verification.
+#:
+#: Used by the :validator:`KeyboardWalkValidator`.
+PASSWORD_KEYBOARD_WALK_MIN_LENGTH = getattr(
+    settings, "PASSWORD_KEYBOARD_WALK_MIN_LENGTH", 5
+)
+#: The location of a character Markov model trained on
+#: common passwords, written by the ``build_password_markov_model``
+#: management command.
+#:
+#: Used by the :validator:`MarkovValidator`.
+PASSWORD_MARKOV_MODEL = getattr(settings, "PASSWORD_MARKOV_MODEL", None)
+#: Specifies the minimum number of bits a password must cost
+#: under the Markov model, see :py:attr:`PASSWORD_MARKOV_MODEL`.
+#:
+#: Used by the :validator:`MarkovValidator`.
+PASSWORD_MARKOV_MIN_BITS = getattr(settings, "PASSWORD_MARKOV_MIN_BITS", 30)
 #: Specifies how close a fuzzy match has to be,
-#: considered a match.
+#: considered a match. For common sequences, the fraction
+#: of a password a run of a sequence has to cover.
 #:
 #: Used by the :validator:`CommonSequenceValidator`.
 PASSWORD_MATCH_THRESHOLD = getattr(settings, "PASSWORD_MATCH_THRESHOLD", 0.9)
+#: Determines wether to undo leetspeak (``p@ssw0rd``),
+#: reversal (``drowssap``) and shifted keys (``!@#$%``)
+#: before matching passwords. The variants of a password
+#: are compared to the common sequences and looked up in
+#: the dictionary (see :py:attr:`PASSWORD_DICTIONARY_EXACT_MATCH`).
+#:
+#: Used by the :validator:`CommonSequenceValidator` and the
+#: :validator:`DictionaryValidator`.
+PASSWORD_MATCH_VARIANTS = getattr(settings, "PASSWORD_MATCH_VARIANTS", True)
 #: Specifies the maximum amount of consecutive characters
 #: allowed in passwords.
 #:
@@ -114,16 +242,56 @@ PASSWORD_MAX_CONSECUTIVE = getattr(settings, "PASSWORD_MAX_CONSECUTIVE", 3)
 #:
 #: Used by the :formfield:`PasswordPoliciesField`.
 PASSWORD_MAX_LENGTH = getattr(settings, "PASSWORD_MAX_LENGTH", None)
+#: Specifies the maximum fraction of a password that may be
+#: covered by a repeated block of characters, like ``abcabcabc``
+#: in ``abcabcabc!1``. A ratio between 0 and 1.
+#:
+#: A value of None disables repeated substring verification.
+#:
+#: Used by the :validator:`RepeatedSubstringValidator`.
+PASSWORD_MAX_REPEATED_COVERAGE = getattr(
+    settings, "PASSWORD_MAX_REPEATED_COVERAGE", 0.5
+)
+#: The model measuring the entropy of passwords: ``"shannon"``,
+#: ``"pool"`` or ``"conditional"``, see
+#: :py:mod:`password_policies.forms.entropy`.
+#:
+#: Used by the :validator:`EntropyValidator`.
+PASSWORD_ENTROPY_MODEL = getattr(settings, "PASSWORD_ENTROPY_MODEL", "shannon")
+#: Specifies the number of matches kept per position of a
+#: password when estimating its number of guesses, which
+#: bounds the time spent on a password.
+#:
+#: Used by the :validator:`GuessesValidator`.
+PASSWORD_GUESSES_MAX_MATCHES = getattr(settings, "PASSWORD_GUESSES_MAX_MATCHES", 8)
 #: Specifies the minimum entropy of long passwords
 #: (len(password) >= 100).
 #:
 #: Used by the :validator:`EntropyValidator`.
 PASSWORD_MIN_ENTROPY_LONG = getattr(settings, "PASSWORD_MIN_ENTROPY_LONG", 5.3)
+#: Specifies the minimum entropy of long passwords
+#: (len(password) >= 100) if :py:attr:`PASSWORD_ENTROPY_MODEL` is
+#: ``"conditional"``. The conditional entropy of random passwords of
+#: 100 characters is estimated at 3 bits or more, that of passwords
+#: repeating a block at less than 2 bits.
+#:
+#: Used by the :validator:`EntropyValidator`.
+PASSWORD_MIN_CONDITIONAL_ENTROPY_LONG = getattr(
+    settings, "PASSWORD_MIN_CONDITIONAL_ENTROPY_LONG", 2.0
+)
 #: Specifies the minimum entropy of short passwords
 #: (len(password) < 100).
 #:
 #: Used by the :validator:`EntropyValidator`.
 PASSWORD_MIN_ENTROPY_SHORT = getattr(settings, "PASSWORD_MIN_ENTROPY_SHORT", 0.8)
+#: Specifies the minimum number of guesses an attacker trying
+#: dictionary words, keyboard walks, repeats and dates first
+#: needs to find a password.
+#:
+#: Defaults to 10 ** 8.
+#:
+#: Used by the :validator:`GuessesValidator`.
+PASSWORD_MIN_GUESSES = getattr(settings, "PASSWORD_MIN_GUESSES", 10**8)
 #: Specifies the minimum length for passwords.
 #:
 #: Used by the :formfield:`PasswordPoliciesField`.
@@ -153,11 +321,32 @@ PASSWORD_MIN_NUMBERS = getattr(settings, "PASSWORD_MIN_NUMBERS", 1)
 #:
 #: Used by :validator:`SymbolCountValidator`.
 PASSWORD_MIN_SYMBOLS = getattr(settings, "PASSWORD_MIN_SYMBOLS", 1)
+#: The algorithm computing the distance between a password
+#: and a string it is compared to. ``"dp"`` fills the dynamic
+#: programming matrix cell by cell, ``"myers"`` uses Myers'
+#: bit-parallel algorithm to compute a column at once. Both
+#: return the same distances.
+#:
+#: Used by the :validator:`CommonSequenceValidator` and the
+#: :validator:`DictionaryValidator`.
+PASSWORD_SIMILARITY_KERNEL = getattr(settings, "PASSWORD_SIMILARITY_KERNEL", "dp")
 #: Determines wether to validate passwords using the
 #: :validator:`CracklibValidator`.
 PASSWORD_USE_CRACKLIB = getattr(settings, "PASSWORD_USE_CRACKLIB", False)
 #: Determines wether to use the password history.
 PASSWORD_USE_HISTORY = getattr(settings, "PASSWORD_USE_HISTORY", True)
+#: The attributes of the user a new password must not be
+#: similar to (see :py:attr:`PASSWORD_MATCH_THRESHOLD`), nor
+#: their parts like the user part of the email address.
+#:
+#: An empty list disables the verification.
+#:
+#: Used by the :validator:`UserAttributeValidator`.
+PASSWORD_USER_ATTRIBUTES = getattr(
+    settings,
+    "PASSWORD_USER_ATTRIBUTES",
+    ["username", "email", "first_name", "last_name"],
+)
 #: A list of project specific words to check a password
 #: against.
 #:
@@ -16,6 +16,7 @@ from django.utils.translation import ngettext
 
 from password_policies.conf import settings
 from password_policies.forms.fields import PasswordPoliciesField
+from password_policies.forms.validators import validate_user_attributes
 from password_policies.models import PasswordChangeRequired, PasswordHistory
 
 
@@ -129,8 +130,12 @@ class PasswordPoliciesForm(forms.Form):
 
     def clean_new_password1(self):
         """
-        Validates that a given password was not used before."""
+        Validates that a given password is not similar to the user's
+        attributes (see
+        :py:attr:`password_policies.conf.Settings.PASSWORD_USER_ATTRIBUTES`)
+        and was not used before."""
         new_password1 = self.cleaned_data.get("new_password1")
+        validate_user_attributes(new_password1, self.user)
         if settings.PASSWORD_USE_HISTORY:
             if self.user.check_password(new_password1):
                 raise forms.ValidationError(self.error_messages["password_used"])
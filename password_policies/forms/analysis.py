@@ -0,0 +1,308 @@
+import stringprep
+import unicodedata
+from collections import Counter, namedtuple
+from functools import cached_property
+from typing import Dict, List
+
+from django.utils.encoding import force_str
+
+#: The general categories of the unicode database. The position of a
+#: category in this tuple is its code in the category table.
+CATEGORIES = (
+    "Cc",
+    "Cf",
+    "Cn",
+    "Co",
+    "Cs",
+    "Ll",
+    "Lm",
+    "Lo",
+    "Lt",
+    "Lu",
+    "Mc",
+    "Me",
+    "Mn",
+    "Nd",
+    "Nl",
+    "No",
+    "Pc",
+    "Pd",
+    "Pe",
+    "Pf",
+    "Pi",
+    "Po",
+    "Ps",
+    "Sc",
+    "Sk",
+    "Sm",
+    "So",
+    "Zl",
+    "Zp",
+    "Zs",
+)
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+#: A substring made of a repeated block: its position, its length and
+#: the length of the block. The last copy of the block may be partial.
+Repetition = namedtuple("Repetition", ["start", "length", "period"])
+
+#: The stringprep flag of characters prohibited by `RFC 4013`_ (tables
+#: C.1.2, C.2.1, C.2.2 and C.3 to C.9).
+#:
+#: .. _`RFC 4013`: http://tools.ietf.org/html/rfc4013
+PROHIBITED = 1
+#: The stringprep flag of characters with bidirectional property R or AL
+#: (table D.1).
+RAND_AL_CAT = 2
+#: The stringprep flag of characters with bidirectional property L
+#: (table D.2).
+L_CAT = 4
+
+_category_table = None
+_stringprep_table = None
+
+
+def get_category_table():
+    """
+    Returns a :py:class:`bytes` object holding the category code of
+    every character of the Basic Multilingual Plane.
+
+    The table is built on first use and takes 64 KiB."""
+    global _category_table
+    if _category_table is None:
+        _category_table = bytes(
+            map(
+                CATEGORY_CODES.__getitem__,
+                map(unicodedata.category, map(chr, range(0x10000))),
+            )
+        )
+    return _category_table
+
+
+def stringprep_flags(character):
+    """Returns the stringprep flags of a character, see :py:data:`PROHIBITED`."""
+    flags = 0
+    if (
+        stringprep.in_table_c12(character)
+        or stringprep.in_table_c21_c22(character)
+        or stringprep.in_table_c3(character)
+        or stringprep.in_table_c4(character)
+        or stringprep.in_table_c5(character)
+        or stringprep.in_table_c6(character)
+        or stringprep.in_table_c7(character)
+        or stringprep.in_table_c8(character)
+        or stringprep.in_table_c9(character)
+    ):
+        flags |= PROHIBITED
+    if stringprep.in_table_d1(character):
+        flags |= RAND_AL_CAT
+    if stringprep.in_table_d2(character):
+        flags |= L_CAT
+    return flags
+
+
+def get_stringprep_table():
+    """
+    Returns a :py:class:`bytes` object holding the stringprep flags of
+    every character of the Basic Multilingual Plane.
+
+    The table is built on first use and takes 64 KiB."""
+    global _stringprep_table
+    if _stringprep_table is None:
+        _stringprep_table = bytes(map(stringprep_flags, map(chr, range(0x10000))))
+    return _stringprep_table
+
+
+def category_mask(categories):
+    """
+    Returns a bitmask with the bits of the given unicode categories
+    set. Unknown categories (like ``LC``) are ignored."""
+    mask = 0
+    for category in categories:
+        if category in CATEGORY_CODES:
+            mask |= 1 << CATEGORY_CODES[category]
+    return mask
+
+
+def z_function(sequence):
+    """
+    Returns the Z-function of ``sequence``: for each position, the
+    length of the longest common prefix of ``sequence`` and of its
+    suffix starting there. Computed in linear time."""
+    n = len(sequence)
+    z = [0] * n
+    if n:
+        z[0] = n
+    left = right = 0
+    for i in range(1, n):
+        k = min(right - i, z[i - left]) if i < right else 0
+        while i + k < n and sequence[k] == sequence[i + k]:
+            k += 1
+        z[i] = k
+        if i + k > right:
+            left, right = i, i + k
+    return z
+
+
+def find_repetition(string):
+    """
+    Returns the longest :py:data:`Repetition` of ``string`` holding at
+    least two full copies of its block, or ``None``. Of repetitions of
+    the same length, the first one and its shortest block are returned.
+
+    The repetitions are found with the divide and conquer algorithm of
+    `Main and Lorentz`_ in ``O(n log n)``: the repetitions crossing the
+    middle of a part of the string are extended to both sides, for
+    every block length at once, with the :py:func:`z_function` of both
+    halves.
+
+    .. _`Main and Lorentz`: https://doi.org/10.1016/0196-6774(84)90021-X"""
+    # The length, minus the start and minus the block length of the
+    # best repetition, preferring the first one and its shortest block.
+    best = (0, 0, 0)
+    parts = [(0, len(string))]
+    while parts:
+        lo, hi = parts.pop()
+        if hi - lo < 2:
+            continue
+        middle = (lo + hi) // 2
+        parts += [(lo, middle), (middle, hi)]
+        left, right = string[lo:middle], string[middle:hi]
+        reverse_left = left[::-1]
+        # Common suffixes of the left half and of its prefixes.
+        suffixes = z_function(reverse_left)
+        # Common prefixes of the right half and of the suffixes of the part.
+        prefixes = z_function(list(right) + [None] + list(string[lo:hi]))
+        # Common prefixes of the right half and of its suffixes.
+        right_prefixes = z_function(right)
+        # Common suffixes of the left half and of the prefixes of the part.
+        left_suffixes = z_function(
+            list(reverse_left) + [None] + list(string[lo:hi][::-1])
+        )
+        for period in range(1, len(left) + 1):
+            # The block ends in the left half.
+            before = suffixes[period] if period < len(left) else 0
+            after = prefixes[len(right) + 1 + middle - period - lo]
+            if before + after >= period:
+                start = middle - period - before
+                best = max(best, (period + before + after, -start, -period))
+        for period in range(1, len(right) + 1):
+            # The block starts in the right half.
+            before = left_suffixes[len(left) + 1 + hi - middle - period]
+            after = right_prefixes[period] if period < len(right) else 0
+            if before + after >= period:
+                start = middle - before
+                best = max(best, (period + before + after, -start, -period))
+    length, start, period = best
+    return Repetition(-start, length, -period) if length else None
+
+
+class PasswordAnalysis(str):
+    """
+    A password that has been analysed in a single pass.
+
+    Instances behave exactly like the string they were created from, so
+    they can be handed to any validator. The validators of this
+    application read the precomputed data instead of scanning the
+    password again:
+
+    * :py:attr:`histogram`: the amount of characters per category code,
+    * :py:attr:`frequencies`: the number of occurrences of each character,
+    * :py:attr:`runs`: the lengths of runs of identical characters,
+    * :py:attr:`lowercase`: the lowercased password,
+    * :py:attr:`flags`: the stringprep flags of the characters, on
+      first use,
+    * :py:attr:`pairs`: the number of occurrences of each pair of
+      consecutive characters, on first use,
+    * :py:attr:`repetition`: the longest repeated block, on first use."""
+
+    #: A dictionary mapping category codes to the amount of characters.
+    histogram: Dict[int, int]
+    #: A :py:class:`~collections.Counter` of characters.
+    frequencies: Counter
+    #: A list with the length of each run of identical characters.
+    runs: List[int]
+    #: The lowercased password.
+    lowercase: str
+
+    def __new__(cls, value):
+        self = super().__new__(cls, force_str(value))
+        table = get_category_table()
+        frequencies = Counter(self)
+        histogram: Dict[int, int] = {}
+        for character, count in frequencies.items():
+            codepoint = ord(character)
+            if codepoint < 0x10000:
+                code = table[codepoint]
+            else:
+                code = CATEGORY_CODES[unicodedata.category(character)]
+            histogram[code] = histogram.get(code, 0) + count
+        self.histogram = histogram
+        self.frequencies = frequencies
+        runs: List[int] = []
+        previous = None
+        for character in self:
+            if character == previous:
+                runs[-1] += 1
+            else:
+                runs.append(1)
+                previous = character
+        self.runs = runs
+        self.lowercase = self.lower()
+        return self
+
+    @classmethod
+    def from_value(cls, value):
+        """
+        Returns ``value`` if it already is an analysis, a new
+        analysis of ``value`` otherwise."""
+        if isinstance(value, cls):
+            return value
+        return cls(value)
+
+    @property
+    def categories(self):
+        """A dictionary mapping the categories found to their count."""
+        return {CATEGORIES[code]: count for code, count in self.histogram.items()}
+
+    def count_categories(self, categories):
+        """
+        Returns the amount of characters belonging to one of the
+        given unicode categories."""
+        return self.count_mask(category_mask(categories))
+
+    def count_mask(self, mask):
+        """
+        Returns the amount of characters whose category bit is set in
+        the given :py:func:`category_mask`."""
+        return sum(count for code, count in self.histogram.items() if mask >> code & 1)
+
+    @property
+    def longest_run(self):
+        """The length of the longest run of identical characters."""
+        return max(self.runs, default=0)
+
+    @cached_property
+    def flags(self):
+        """
+        A :py:class:`bytes` object holding the stringprep flags of each
+        character, see :py:data:`PROHIBITED`."""
+        table = get_stringprep_table()
+        return bytes(
+            table[ord(character)]
+            if ord(character) < 0x10000
+            else stringprep_flags(character)
+            for character in self
+        )
+
+    @cached_property
+    def pairs(self):
+        """A :py:class:`~collections.Counter` of pairs of consecutive characters."""
+        return Counter(zip(self, self[1:]))
+
+    @cached_property
+    def repetition(self):
+        """
+        The longest :py:data:`Repetition` of the lowercased password, see
+        :py:func:`find_repetition`."""
+        return find_repetition(self.lowercase)
@@ -0,0 +1,95 @@
+"""
+`Bloom filters`_ for the :validator:`BlocklistValidator`.
+
+A Bloom filter answers whether a word is in a set using a few bits per
+word, whatever the length of the words: a word not in the set is
+reported to be in it with a small, configurable probability (the error
+rate), a word in the set is always found.
+
+A filter is stored as a header followed by the raw bit array and is
+opened with :py:mod:`mmap`. Checking a word reads ``hashes`` bits,
+derived from a single BLAKE2b digest of the word by double hashing.
+
+.. _`Bloom filters`: https://en.wikipedia.org/wiki/Bloom_filter"""
+import hashlib
+import math
+import struct
+
+from password_policies.forms.files import atomic_write, map_file
+
+#: Identifies Bloom filters.
+MAGIC = b"PPBLOM"
+#: Incremented whenever the layout or the hashing changes.
+VERSION = 1
+#: Magic, version, number of hashes, number of bits and number of words.
+HEADER = struct.Struct("<6sHIQQ")
+
+
+def get_parameters(count, error_rate):
+    """
+    Returns the number of bits and of hashes of a filter holding
+    ``count`` words with the given error rate."""
+    if not 0 < error_rate < 1:
+        raise ValueError("The error rate must be between 0 and 1.")
+    count = max(count, 1)
+    bits = math.ceil(-count * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / count * math.log(2)))
+    return bits, hashes
+
+
+def get_positions(word, bits, hashes):
+    """Returns the positions of the bits of ``word``."""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    return [(first + i * second) % bits for i in range(hashes)]
+
+
+def build_filter(words, output, error_rate=0.001, count=None):
+    """
+    Writes a Bloom filter of ``words`` to ``output``.
+
+    ``count`` is the number of words; if it is not given ``words`` is
+    turned into a list to count them. Pass it to build a filter from an
+    iterator too large for memory.
+
+    :returns: The number of words added."""
+    if count is None:
+        words = list(words)
+        count = len(words)
+    bits, hashes = get_parameters(count, error_rate)
+    array = bytearray((bits + 7) // 8)
+    added = 0
+    for word in words:
+        for position in get_positions(word, bits, hashes):
+            array[position >> 3] |= 1 << (position & 7)
+        added += 1
+    with atomic_write(output) as target:
+        target.write(HEADER.pack(MAGIC, VERSION, hashes, bits, added))
+        target.write(array)
+    return added
+
+
+class BloomFilter:
+    """A read-only Bloom filter."""
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer, (self.hashes, self.bits, self.count) = map_file(
+            path, HEADER, MAGIC, VERSION, "Bloom filter"
+        )
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, word):
+        buffer, start = self.buffer, HEADER.size
+        for position in get_positions(word, self.bits, self.hashes):
+            if not buffer[start + (position >> 3)] >> (position & 7) & 1:
+                return False
+        return True
+
+    @property
+    def error_rate(self):
+        """The expected probability of finding a word that was not added."""
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
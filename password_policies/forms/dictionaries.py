@@ -0,0 +1,323 @@
+"""
+Compact word storage for the :validator:`DictionaryValidator`.
+
+Words are deduplicated, lowercased, sorted by length and alphabetically
+and stored as UTF-8 in a single buffer, either in memory
+(:py:class:`CompactStrings`) or in a compiled dictionary file
+(:py:class:`CompiledDictionary`). A compiled dictionary is opened with
+:py:mod:`mmap`, so opening it costs the same whatever its size and its
+pages are shared by all processes of a host.
+
+Layout of a compiled dictionary (little endian)::
+
+    header       see HEADER
+    directory    (max_length + 2) x uint32: index of the first word
+                 of each length
+    offsets      (count + 1) x uint32: offset of each word in the data
+    data         the UTF-8 encoded words"""
+import hashlib
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Sequence
+
+from password_policies.forms.files import atomic_write, map_file
+
+#: Identifies compiled dictionaries.
+MAGIC = b"PPDICT"
+#: Incremented whenever the layout changes.
+VERSION = 1
+#: Magic, version, digest of the dictionary file, digest of the words,
+#: size and modification time of the dictionary file, word count and
+#: length of the longest word.
+HEADER = struct.Struct("<6sH32s32sQqII")
+
+
+def file_digest(path):
+    """Returns the SHA-256 digest of a file, or of nothing if ``path`` is empty."""
+    digest = hashlib.sha256()
+    if path:
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(1 << 16), b""):
+                digest.update(chunk)
+    return digest.digest()
+
+
+def words_digest(words):
+    """Returns the SHA-256 digest of a list of words."""
+    return hashlib.sha256("\n".join(words or []).encode("utf-8")).digest()
+
+
+def file_stat(path):
+    """Returns the size and modification time of a file."""
+    if not path:
+        return 0, 0
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_words(dictionary, words):
+    """Yields the stripped lines of a dictionary file, then the words."""
+    if dictionary:
+        with open(dictionary, encoding="utf-8") as lines:
+            for line in lines:
+                yield line.strip()
+    yield from words or []
+
+
+def pack(words):
+    """
+    Deduplicates, lowercases and sorts ``words`` by length, dropping
+    empty words.
+
+    :returns: A tuple of the directory, the offsets and the data (see
+        above) and the length of the longest word."""
+    unique = sorted(
+        {word.lower() for word in words if word}, key=lambda word: (len(word), word)
+    )
+    max_length = len(unique[-1]) if unique else 0
+    directory = array("I", [0] * (max_length + 2))
+    offsets = array("I", [0])
+    data = bytearray()
+    for word in unique:
+        directory[len(word) + 1] += 1
+        data += word.encode("utf-8")
+        offsets.append(len(data))
+    for length in range(1, max_length + 2):
+        directory[length] += directory[length - 1]
+    return directory, offsets, bytes(data), max_length
+
+
+def compile_dictionary(dictionary, words, output):
+    """
+    Compiles a dictionary file and a list of words into ``output``.
+
+    The file is written next to ``output`` and renamed, so processes
+    opening ``output`` meanwhile see either the old or the new file.
+
+    :returns: The number of words compiled."""
+    size, mtime = file_stat(dictionary)
+    checksum = file_digest(dictionary)
+    directory, offsets, data, max_length = pack(read_words(dictionary, words))
+    count = len(offsets) - 1
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        checksum,
+        words_digest(words),
+        size,
+        mtime,
+        count,
+        max_length,
+    )
+    with atomic_write(output) as target:
+        target.write(header)
+        target.write(directory.tobytes())
+        target.write(offsets.tobytes())
+        target.write(data)
+    return count
+
+
+class Bucket:
+    """The words of a :py:class:`PackedStrings` of one length."""
+
+    def __init__(self, strings, start, stop):
+        self.strings = strings
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.strings[self.start + index]
+
+    def __iter__(self):
+        data, offsets = self.strings.data, self.strings.offsets
+        for index in range(self.start, self.stop):
+            yield str(data[offsets[index] : offsets[index + 1]], "utf-8")
+
+    def search(self, grams, minimum):
+        """
+        Yields the words containing at least ``minimum`` of ``grams``, a
+        list of strings counted as often as they occur in it.
+
+        The grams are searched in the encoded words and only the words
+        yielded are decoded."""
+        strings, offsets = self.strings, self.strings.offsets
+        start, stop = offsets[self.start], offsets[self.stop]
+        counts: Counter = Counter()
+        for gram, repeats in Counter(grams).items():
+            encoded = gram.encode("utf-8")
+            position = strings.find_encoded(encoded, start, stop)
+            while position >= 0:
+                index = bisect_right(offsets, position, self.start, self.stop) - 1
+                end = offsets[index + 1]
+                if position + len(encoded) <= end:
+                    # Each word counts a gram once.
+                    counts[index] += repeats
+                    position = end
+                else:
+                    position += 1
+                position = strings.find_encoded(encoded, position, stop)
+        for index, count in counts.items():
+            if count >= minimum:
+                yield strings[index]
+
+
+class PackedStrings:
+    """
+    A read-only sequence of lowercased strings stored as UTF-8 in one
+    buffer, sorted by length, see :py:func:`pack`.
+
+    Strings are decoded when they are accessed, so storing a word costs
+    its encoded length plus four bytes instead of a :py:class:`str`
+    object of 50 bytes or more."""
+
+    #: The index of the first word of each length.
+    directory: Sequence[int] = ()
+    #: The offset of each word in :py:attr:`data`.
+    offsets: Sequence[int] = (0,)
+    #: The encoded words.
+    data = b""
+    #: The number of words.
+    count = 0
+    #: The length of the longest word.
+    max_length = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        offsets = self.offsets
+        return str(self.data[offsets[index] : offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        data, offsets = self.data, self.offsets
+        for index in range(self.count):
+            yield str(data[offsets[index] : offsets[index + 1]], "utf-8")
+
+    def __contains__(self, word):
+        return self.find(word) >= 0
+
+    def find_encoded(self, encoded, start, stop):
+        """
+        Returns the offset of the first occurrence of the bytes
+        ``encoded`` in ``data[start:stop]``, or ``-1``."""
+        return self.data.find(encoded, start, stop)
+
+    def find(self, word):
+        """Returns the index of ``word``, or ``-1`` if it is missing."""
+        bucket = self.bucket(len(word))
+        position = bisect_left(bucket, word)
+        if position < len(bucket) and bucket[position] == word:
+            return bucket.start + position
+        return -1
+
+    def bucket(self, length):
+        """Returns the words of a length."""
+        if length > self.max_length:
+            return Bucket(self, 0, 0)
+        return Bucket(self, self.directory[length], self.directory[length + 1])
+
+    def shard(self, start, stop):
+        """
+        Returns the words from index ``start`` to ``stop`` as
+        :py:class:`CompactStrings`, sent to other processes without the
+        remaining words."""
+        return CompactStrings(self[index] for index in range(start, stop))
+
+    def by_length(self):
+        """Returns a dictionary mapping lengths to the (non-empty) buckets."""
+        buckets = {}
+        for length in range(self.max_length + 1):
+            bucket = self.bucket(length)
+            if len(bucket):
+                buckets[length] = bucket
+        return buckets
+
+
+class CompactStrings(PackedStrings):
+    """
+    :py:class:`PackedStrings` built in memory from an iterable of
+    strings. Duplicates are dropped."""
+
+    def __init__(self, words=()):
+        self.directory, self.offsets, self.data, self.max_length = pack(words)
+        self.count = len(self.offsets) - 1
+
+
+class CompiledDictionary(PackedStrings):
+    """:py:class:`PackedStrings` read from a compiled dictionary."""
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer, (
+            self.checksum,
+            self.words_digest,
+            self.size,
+            self.mtime,
+            self.count,
+            self.max_length,
+        ) = map_file(path, HEADER, MAGIC, VERSION, "compiled dictionary")
+        view = memoryview(self.buffer)
+        start = HEADER.size
+        stop = start + 4 * (self.max_length + 2)
+        self.directory = view[start:stop].cast("I")
+        start, stop = stop, stop + 4 * (self.count + 1)
+        self.offsets = view[start:stop].cast("I")
+        self.data = view[stop:]
+        self.data_offset = stop
+
+    def find_encoded(self, encoded, start, stop):
+        # Memory views cannot be searched, the mapped file can.
+        base = self.data_offset
+        position = self.buffer.find(encoded, base + start, base + stop)
+        return position - base if position >= 0 else -1
+
+    def __reduce__(self):
+        # Processes receiving a compiled dictionary map the file again.
+        return self.__class__, (self.path,)
+
+    def shard(self, start, stop):
+        """
+        Returns the words from index ``start`` to ``stop`` as a
+        :py:class:`Bucket`: the processes receiving it map the file
+        and only read the pages of their words."""
+        return Bucket(self, start, stop)
+
+    def is_stale(self, dictionary, words):
+        """
+        Returns ``True`` if the dictionary file or the words changed
+        since the dictionary was compiled. The dictionary file is only
+        read if its size or modification time changed; if it is missing
+        the compiled dictionary is kept."""
+        if self.words_digest != words_digest(words):
+            return True
+        try:
+            stat = file_stat(dictionary)
+        except OSError:
+            return False
+        if (self.size, self.mtime) == stat:
+            return False
+        return self.checksum != file_digest(dictionary)
+
+
+def open_compiled(path, dictionary, words):
+    """
+    Opens the compiled dictionary at ``path``, compiling it first if
+    it does not exist or is stale."""
+    try:
+        compiled = CompiledDictionary(path)
+    except (OSError, ValueError):
+        compiled = None
+    if compiled is None or compiled.is_stale(dictionary, words):
+        compile_dictionary(dictionary, words, path)
+        compiled = CompiledDictionary(path)
+    return compiled
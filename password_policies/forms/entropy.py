@@ -0,0 +1,141 @@
+"""
+Entropy models for the :validator:`EntropyValidator`.
+
+A model measures a :py:class:`~password_policies.forms.analysis.PasswordAnalysis`
+and returns its entropy and the ideal entropy of a password of the same
+length, both in bits per character. The models only read the counts
+collected by the analysis and a table of ``c * log2(c)`` built once, so
+measuring a password is linear in its length:
+
+* ``shannon``: the Shannon entropy of the characters,
+* ``pool``: the size of the pool of the character classes used, as
+  estimated by most password meters,
+* ``conditional``: the first-order conditional entropy, i.e. the
+  entropy of a character knowing the previous one. It is low for long
+  inputs repeating a varied block, which have a high Shannon entropy.
+  Short passwords do not hold enough pairs to estimate it and are
+  measured with the Shannon entropy.
+
+  Even long passwords hold few of the possible pairs, so the entropy
+  of the pairs and of the previous characters are estimated with the
+  `Chao-Shen`_ estimator, which accounts for the pairs not seen, and
+  the result is capped at the Shannon entropy. It still falls short of
+  the entropy of random passwords and is compared to its own minimum,
+  see :py:attr:`~password_policies.conf.Settings.PASSWORD_MIN_CONDITIONAL_ENTROPY_LONG`.
+
+.. _`Chao-Shen`: https://doi.org/10.1023/A:1026096204727"""
+import math
+from array import array
+
+from password_policies.forms.analysis import CATEGORIES
+
+#: The counts for which ``c * log2(c)`` is precomputed.
+TABLE_SIZE = 256
+_xlog2 = array("d", [0.0] + [c * math.log2(c) for c in range(1, TABLE_SIZE)])
+
+#: The character class of unicode categories, or of the first letter of
+#: their code.
+CLASSES = {
+    "Ll": "lowercase",
+    "Lu": "uppercase",
+    "Nd": "digits",
+    "P": "symbols",
+    "S": "symbols",
+    "Zs": "symbols",
+}
+#: The size of the pool of each character class.
+POOLS = {"lowercase": 26, "uppercase": 26, "digits": 10, "symbols": 33}
+#: The size of the pool of the characters of any other category, e.g.
+#: letters of other scripts.
+OTHER_POOL = 100
+#: The size of the pool of the printable ASCII characters.
+ASCII_POOL = 95
+#: The minimum length for the conditional entropy to be estimated.
+MIN_CONDITIONAL_LENGTH = 100
+
+
+def xlog2(count):
+    """Returns ``count * log2(count)``, looked up for small counts."""
+    if count < TABLE_SIZE:
+        return _xlog2[count]
+    return count * math.log2(count)
+
+
+def counts_entropy(counts, total):
+    """Returns the Shannon entropy of ``counts`` summing up to ``total``."""
+    if not total:
+        return 0.0
+    return math.log2(total) - sum(map(xlog2, counts)) / total
+
+
+def coverage_entropy(counts, total):
+    """
+    Returns the `Chao-Shen`_ estimate of the entropy of ``counts``
+    summing up to ``total``: the observed frequencies are scaled by the
+    estimated coverage of the sample, one minus the share of counts
+    seen once, and weighted by their probability to be seen at all."""
+    if not total:
+        return 0.0
+    singletons = sum(count == 1 for count in counts)
+    # A sample of singletons only would cover nothing.
+    coverage = 1 - min(singletons, total - 1) / total
+    entropy = 0.0
+    for count in counts:
+        probability = coverage * count / total
+        seen = 1 - (1 - probability) ** total
+        entropy -= probability * math.log2(probability) / seen
+    return entropy
+
+
+def shannon(analysis):
+    """
+    Returns the Shannon entropy of the characters and the entropy of
+    as many distinct characters."""
+    length = len(analysis)
+    entropy = counts_entropy(analysis.frequencies.values(), length)
+    return entropy, math.log2(length) if length else 0.0
+
+
+def pool(analysis):
+    """
+    Returns the logarithm of the size of the pool of the character
+    classes used and that of the printable ASCII characters."""
+    classes = set()
+    for code in analysis.histogram:
+        category = CATEGORIES[code]
+        classes.add(CLASSES.get(category, CLASSES.get(category[0], category)))
+    size = sum(POOLS.get(name, OTHER_POOL) for name in classes)
+    return math.log2(size) if size else 0.0, math.log2(ASCII_POOL)
+
+
+def conditional(analysis):
+    """
+    Returns the entropy of a character knowing the previous one, at
+    most the Shannon entropy, and the entropy of as many distinct
+    characters. Passwords shorter than :py:data:`MIN_CONDITIONAL_LENGTH`
+    are measured by :py:func:`shannon`."""
+    length = len(analysis)
+    if length < MIN_CONDITIONAL_LENGTH:
+        return shannon(analysis)
+    unconditional = counts_entropy(analysis.frequencies.values(), length)
+    previous = analysis.frequencies.copy()
+    previous[analysis[-1]] -= 1
+    entropy = coverage_entropy(analysis.pairs.values(), length - 1)
+    entropy -= coverage_entropy((+previous).values(), length - 1)
+    return min(max(entropy, 0.0), unconditional), math.log2(length)
+
+
+#: The available models by name.
+MODELS = {
+    "shannon": shannon,
+    "pool": pool,
+    "conditional": conditional,
+}
+
+
+def get_model(name):
+    """Returns the entropy model of a name."""
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise ValueError("Unknown entropy model %r." % name)
@@ -1,6 +1,7 @@
 from django import forms
 
 from password_policies.forms import validators
+from password_policies.forms.analysis import PasswordAnalysis
 
 
 class PasswordPoliciesField(forms.CharField):
@@ -12,6 +13,8 @@ class PasswordPoliciesField(forms.CharField):
         validators.validate_consecutive_count,
         validators.validate_cracklib,
         validators.validate_dictionary_words,
+        validators.validate_blocklist,
+        validators.validate_breached_password,
         validators.validate_letter_count,
         validators.validate_lowercase_letter_count,
         validators.validate_uppercase_letter_count,
@@ -25,3 +28,12 @@ class PasswordPoliciesField(forms.CharField):
         if "widget" not in kwargs:
             kwargs["widget"] = forms.PasswordInput(render_value=False)
         super().__init__(*args, **kwargs)
+
+    def run_validators(self, value):
+        """
+        Analyses the password once and hands the
+        :class:`~password_policies.forms.analysis.PasswordAnalysis`
+        to all validators."""
+        if value not in self.empty_values:
+            value = PasswordAnalysis(value)
+        super().run_validators(value)
@@ -0,0 +1,77 @@
+"""
+Reading and writing the files of the validators: the lists of
+passwords they are built from and the binary files they open, compiled
+dictionaries, hash lists, Bloom filters and Markov models.
+
+Each file starts with a header holding a magic string identifying its
+format and a version incremented whenever the layout changes. Files
+are opened with :py:mod:`mmap`, so opening them costs the same
+whatever their size and their pages are shared by all processes of a
+host."""
+import contextlib
+import mmap
+import os
+import struct
+import tempfile
+
+
+def read_lines(path):
+    """
+    Yields the non-empty lines of a UTF-8 encoded text file, without
+    their line endings."""
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+
+
+def get_umask():
+    """Returns the file mode creation mask of the process."""
+    # It can only be read by setting it.
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return umask
+
+
+@contextlib.contextmanager
+def atomic_write(output):
+    """
+    Returns a context manager opening a temporary file next to
+    ``output`` for writing in binary mode. The file is renamed to
+    ``output`` once it is closed, so processes opening ``output``
+    meanwhile see either the old or the new file, and removed if an
+    exception is raised. The file gets the permissions of a file
+    created by :py:func:`open`, not the private ones of
+    :py:func:`tempfile.mkstemp`."""
+    handle, path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        with os.fdopen(handle, "wb") as target:
+            yield target
+        os.chmod(path, 0o666 & ~get_umask())
+        os.replace(path, output)
+    except BaseException:
+        os.remove(path)
+        raise
+
+
+def map_file(path, header, magic, version, name):
+    """
+    Maps the file at ``path`` into memory and reads its header.
+
+    :param header: The :py:class:`struct.Struct` of the header, starting
+        with the magic string and the version.
+    :param name: The name of the format, for the error message.
+    :returns: A tuple of the :py:class:`mmap.mmap` and of the fields of
+        the header following the magic string and the version.
+    :raises ValueError: If the file is not of this format and version."""
+    with open(path, "rb") as source:
+        buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        fields = header.unpack_from(buffer)
+    except struct.error:
+        fields = None
+    if fields is None or fields[:2] != (magic, version):
+        buffer.close()
+        raise ValueError("%s is not a %s." % (path, name))
+    return buffer, fields[2:]
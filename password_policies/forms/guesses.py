@@ -0,0 +1,245 @@
+"""
+Guess numbers for the :validator:`GuessesValidator`, after `zxcvbn`_.
+
+A password is split into the patterns an attacker would try first:
+
+* ``dictionary``: words of a frequency-ordered wordlist, guessed in the
+  order of the list, also in uppercase, leetspeak and reversed,
+* ``walk``: walks over adjacent keys, see
+  :py:mod:`password_policies.forms.keyboards`,
+* ``repeat``: a repeated block, guessed as often as it is repeated,
+* ``date``: dates and years, guessed from the current year on,
+* ``bruteforce``: any other characters.
+
+Every match is given the number of guesses needed to find it, and the
+segmentation of the password needing the fewest guesses overall is
+found by dynamic programming over the positions of the matches. Only
+the :py:data:`MAX_MATCHES` cheapest matches starting at each position
+are kept and only the first :py:data:`MAX_LENGTH` characters are
+segmented, so the time spent on a password is bounded.
+
+The numbers of guesses are handled as their decimal logarithms.
+
+.. _`zxcvbn`: https://github.com/dropbox/zxcvbn"""
+import heapq
+import math
+import re
+from array import array
+from collections import namedtuple
+from datetime import date
+from typing import Dict, List
+
+from password_policies.forms import dictionaries, keyboards
+from password_policies.forms.analysis import find_repetition
+from password_policies.forms.normalization import LEET
+
+#: A part of a password: its position, its pattern and the decimal
+#: logarithm of the number of guesses needed to find it.
+Match = namedtuple("Match", ["start", "stop", "pattern", "guesses"])
+#: The estimate of a password: the decimal logarithm of the number of
+#: guesses and the matches of its cheapest segmentation.
+Estimate = namedtuple("Estimate", ["guesses", "sequence"])
+
+#: The number of guesses per brute-forced character.
+BRUTEFORCE_CARDINALITY = 10
+#: The minimum number of guesses of a match of several characters.
+MIN_SUBMATCH_GUESSES = 50
+#: The number of characters segmented, the others are brute-forced.
+MAX_LENGTH = 64
+#: The default number of matches kept per position.
+MAX_MATCHES = 8
+#: The minimum number of characters of a dictionary word or a walk.
+MIN_MATCH_LENGTH = 3
+#: The minimum number of years guessed for a date.
+MIN_YEAR_SPACE = 20
+#: Matches dates with separators, like ``24.12.1999`` or ``1999-12-24``.
+DATE_REGEX = re.compile(r"(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})")
+#: Matches runs of digits.
+DIGITS_REGEX = re.compile(r"\d{4,}")
+
+
+class RankedWords(dictionaries.CompactStrings):
+    """
+    :py:class:`~password_policies.forms.dictionaries.CompactStrings`
+    holding the rank of each word: its position in the list of words,
+    counting each word once. The ranks take four bytes per word."""
+
+    def __init__(self, words=()):
+        words = list(words)
+        super().__init__(words)
+        self.ranks = array("I", bytes(4 * self.count))
+        rank = 0
+        for word in words:
+            index = self.find(word.lower())
+            if index >= 0 and not self.ranks[index]:
+                rank += 1
+                self.ranks[index] = rank
+
+    def rank(self, word):
+        """Returns the rank of a lowercased word, or ``0`` if it is missing."""
+        index = self.find(word)
+        return self.ranks[index] if index >= 0 else 0
+
+
+def uppercase_variations(word):
+    """Returns the number of ways to capitalize ``word`` like it is."""
+    upper = sum(character.isupper() for character in word)
+    if not upper:
+        return 1
+    if word.isupper() or upper == 1 and (word[0].isupper() or word[-1].isupper()):
+        return 2
+    lower = sum(character.islower() for character in word)
+    return sum(math.comb(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def dictionary_matches(password, words):
+    """Yields the words of ``password`` found in ``words``."""
+    lowercase = password.lower()
+    lengths = set(words.by_length())
+    for start in range(len(password)):
+        for stop in range(start + MIN_MATCH_LENGTH, len(password) + 1):
+            if stop - start not in lengths:
+                continue
+            word = lowercase[start:stop]
+            cases = uppercase_variations(password[start:stop])
+            for variant, variations in (
+                (word, cases),
+                (word.translate(LEET), 2 * cases),
+                (word[::-1], 2 * cases),
+            ):
+                rank = words.rank(variant)
+                if rank:
+                    guesses = math.log10(rank * variations)
+                    yield Match(start, stop, "dictionary", guesses)
+                    break
+
+
+def walk_guesses(layout, length, turns):
+    """Returns the number of walks of ``length`` keys with ``turns`` turns."""
+    keys = len(layout.neighbours) // layout.directions
+    guesses = 0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns + 1, i - 1) + 1):
+            guesses += math.comb(i - 1, j - 1) * keys * layout.directions**j
+    return guesses
+
+
+def walk_matches(password, layouts):
+    """Yields the keyboard walks of ``password`` on the named layouts."""
+    for name in layouts:
+        layout = keyboards.LAYOUTS[name]
+        for walk in layout.walks(password):
+            if walk.length >= MIN_MATCH_LENGTH:
+                guesses = walk_guesses(layout, walk.length, walk.turns)
+                stop = walk.start + walk.length
+                yield Match(walk.start, stop, "walk", math.log10(guesses))
+
+
+def year_guesses(year):
+    """Returns the number of years between ``year`` and this year."""
+    return max(abs(year - date.today().year), MIN_YEAR_SPACE)
+
+
+def parse_date(first, second, third):
+    """
+    Returns the year of a date written as three groups of digits, the
+    year first or last, or ``None`` if they are not a date."""
+    for year, month, day in (
+        (third, second, first),
+        (third, first, second),
+        (first, second, third),
+    ):
+        if len(year) not in (2, 4) or len(month) > 2 or len(day) > 2:
+            continue
+        if not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+            continue
+        year = int(year)
+        if year < 100:
+            year += 1900 if year > 50 else 2000
+        if 1000 <= year <= 2099:
+            return year
+    return None
+
+
+def date_matches(password):
+    """Yields the dates and years of ``password``."""
+    for match in DATE_REGEX.finditer(password):
+        year = parse_date(match.group(1), match.group(3), match.group(4))
+        if year is not None:
+            guesses = math.log10(365 * 4 * year_guesses(year))
+            yield Match(match.start(), match.end(), "date", guesses)
+    for match in DIGITS_REGEX.finditer(password):
+        for start in range(match.start(), match.end() - 3):
+            year = int(password[start : start + 4])
+            if 1000 <= year <= 2099:
+                guesses = math.log10(year_guesses(year))
+                yield Match(start, start + 4, "date", guesses)
+            for stop in range(start + 4, min(start + 8, match.end()) + 1):
+                span = password[start:stop]
+                for first in range(1, len(span) - 1):
+                    for second in range(first + 1, len(span)):
+                        year = parse_date(
+                            span[:first], span[first:second], span[second:]
+                        )
+                        if year is not None:
+                            guesses = math.log10(365 * year_guesses(year))
+                            yield Match(start, stop, "date", guesses)
+
+
+def repeat_matches(password, words, layouts, max_matches):
+    """Yields the longest repeated block of ``password``."""
+    repetition = find_repetition(password.lower())
+    if repetition is not None:
+        start, stop = repetition.start, repetition.start + repetition.length
+        block = password[start : start + repetition.period]
+        guesses = estimate(block, words, layouts, max_matches).guesses
+        guesses += math.log10(repetition.length / repetition.period)
+        yield Match(start, stop, "repeat", guesses)
+
+
+def estimate(password, words=None, layouts=(), max_matches=MAX_MATCHES):
+    """
+    Returns the :py:data:`Estimate` of ``password``.
+
+    :param words: :py:class:`RankedWords`.
+    :param layouts: The names of the keyboard layouts searched for walks.
+    :param max_matches: The number of matches kept per position."""
+    tail = max(len(password) - MAX_LENGTH, 0)
+    password = password[:MAX_LENGTH]
+    matches = list(date_matches(password))
+    matches += walk_matches(password, layouts)
+    matches += repeat_matches(password, words, layouts, max_matches)
+    if words is not None and words.count:
+        matches += dictionary_matches(password, words)
+    starts: Dict[int, List[Match]] = {}
+    for match in matches:
+        starts.setdefault(match.start, []).append(match)
+    stops: Dict[int, List[Match]] = {}
+    for candidates in starts.values():
+        cheapest = heapq.nsmallest(max_matches, candidates, key=lambda m: m.guesses)
+        for match in cheapest:
+            stops.setdefault(match.stop, []).append(match)
+    # The fewest guesses needed for each prefix, and the last match.
+    bruteforce = math.log10(BRUTEFORCE_CARDINALITY)
+    floor = math.log10(MIN_SUBMATCH_GUESSES)
+    best = [0.0] + [math.inf] * len(password)
+    last = [None] * (len(password) + 1)
+    for stop in range(1, len(password) + 1):
+        best[stop] = best[stop - 1] + bruteforce
+        for match in stops.get(stop, ()):
+            guesses = best[match.start] + max(match.guesses, floor)
+            if guesses < best[stop]:
+                best[stop], last[stop] = guesses, match
+    sequence = []
+    stop = len(password)
+    while stop:
+        match = last[stop]
+        if match is None:
+            start = stop - 1
+            while start and last[start] is None:
+                start -= 1
+            match = Match(start, stop, "bruteforce", (stop - start) * bruteforce)
+        sequence.append(match)
+        stop = match.start
+    sequence.reverse()
+    return Estimate(best[-1] + tail * bruteforce, sequence)
@@ -0,0 +1,172 @@
+"""
+Sorted lists of password hashes for the :validator:`BreachedPasswordValidator`.
+
+A hash list is a binary file holding the distinct digests of breached
+passwords, sorted and of a fixed width, e.g. converted from a download
+of `Have I Been Pwned`_'s Pwned Passwords. It is opened with
+:py:mod:`mmap` and searched without reading it: a table of the position
+of the first digest of every two-byte prefix narrows the search to a
+few hundred digests, which are then bisected.
+
+Layout (little endian)::
+
+    header       see HEADER
+    prefixes     65537 x uint64: index of the first digest starting
+                 with each two-byte prefix
+    digests      count x digest_size bytes, sorted
+
+.. _`Have I Been Pwned`: https://haveibeenpwned.com/Passwords"""
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+
+from password_policies.forms.files import atomic_write, map_file
+
+#: Identifies hash lists.
+MAGIC = b"PPHASH"
+#: Incremented whenever the layout changes.
+VERSION = 1
+#: Magic, version, name of the algorithm, digest size and digest count.
+HEADER = struct.Struct("<6sH8sIQ")
+#: The number of two-byte prefixes.
+PREFIXES = 1 << 16
+
+
+def sha1(password):
+    """Returns the SHA-1 digest of the UTF-8 encoded password."""
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+def ntlm(password):
+    """
+    Returns the NTLM hash (MD4 of the UTF-16-LE encoded password).
+    Requires an OpenSSL build providing MD4."""
+    return hashlib.new("md4", password.encode("utf-16-le")).digest()
+
+
+#: The supported algorithms by name and the size of their digests.
+ALGORITHMS = {
+    "sha1": (sha1, 20),
+    "ntlm": (ntlm, 16),
+}
+
+
+def get_algorithm(name):
+    """Returns the hash function and digest size of an algorithm."""
+    try:
+        return ALGORITHMS[name]
+    except KeyError:
+        raise ValueError("Unknown hash algorithm %r." % name)
+
+
+def read_digests(lines, algorithm, plain=False):
+    """
+    Yields the digests of the lines of a dump, in the format of Pwned
+    Passwords (``HASH:COUNT``, hexadecimal hashes), or the digests of
+    the passwords if ``plain`` is ``True``."""
+    function, size = get_algorithm(algorithm)
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if plain:
+            if line:
+                yield function(line)
+            continue
+        line = line.split(":", 1)[0].strip()
+        if not line:
+            continue
+        digest = bytes.fromhex(line)
+        if len(digest) != size:
+            raise ValueError("%r is not a %s hash." % (line, algorithm))
+        yield digest
+
+
+def convert_hashes(lines, output, algorithm="sha1", plain=False):
+    """
+    Writes the digests read from ``lines`` (see :py:func:`read_digests`)
+    into a hash list at ``output``.
+
+    The digests do not need to be sorted: they are spread over one
+    temporary file per first byte, each of which is small enough to be
+    sorted in memory.
+
+    :returns: The number of distinct digests written."""
+    function, size = get_algorithm(algorithm)
+    directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        spills = [
+            open(os.path.join(directory, "%02x" % byte), "wb") for byte in range(256)
+        ]
+        try:
+            for digest in read_digests(lines, algorithm, plain):
+                spills[digest[0]].write(digest)
+        finally:
+            for spill in spills:
+                spill.close()
+        prefixes = array("Q", [0] * (PREFIXES + 1))
+        count = 0
+        with atomic_write(output) as target:
+            target.write(bytes(HEADER.size + 8 * len(prefixes)))
+            for byte in range(256):
+                with open(os.path.join(directory, "%02x" % byte), "rb") as source:
+                    data = source.read()
+                digests = sorted(
+                    {data[i : i + size] for i in range(0, len(data), size)}
+                )
+                for digest in digests:
+                    prefixes[(digest[0] << 8 | digest[1]) + 1] += 1
+                target.write(b"".join(digests))
+                count += len(digests)
+            for prefix in range(1, len(prefixes)):
+                prefixes[prefix] += prefixes[prefix - 1]
+            target.seek(0)
+            target.write(
+                HEADER.pack(MAGIC, VERSION, algorithm.encode("ascii"), size, count)
+            )
+            target.write(prefixes.tobytes())
+    finally:
+        shutil.rmtree(directory)
+    return count
+
+
+class HashList:
+    """A read-only set of the digests of a hash list."""
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer, (algorithm, self.size, self.count) = map_file(
+            path, HEADER, MAGIC, VERSION, "hash list"
+        )
+        #: The name of the algorithm of the digests.
+        self.algorithm = algorithm.rstrip(b"\0").decode("ascii")
+        self.function = get_algorithm(self.algorithm)[0]
+        start = HEADER.size
+        self.start = start + 8 * (PREFIXES + 1)
+        self.prefixes = memoryview(self.buffer)[start : self.start].cast("Q")
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, digest):
+        if len(digest) != self.size:
+            return False
+        prefix = digest[0] << 8 | digest[1]
+        low, high = self.prefixes[prefix], self.prefixes[prefix + 1]
+        buffer, size, start = self.buffer, self.size, self.start
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * size
+            candidate = buffer[offset : offset + size]
+            if candidate < digest:
+                low = middle + 1
+            elif candidate > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def contains_password(self, password):
+        """Returns ``True`` if the digest of ``password`` is in the list."""
+        return self.function(password) in self
@@ -0,0 +1,150 @@
+"""
+Adjacency graphs of keyboard layouts, to find keyboard walks like
+``qwerty``, ``1qaz2wsx`` or ``qawsedrf`` in passwords.
+
+A layout is described by its rows of keys, unshifted and shifted. It is
+compiled once into an :py:class:`array.array` holding the neighbour of
+every key in each direction, so that a password is scanned in a single
+pass, looking up at most eight neighbours per character."""
+from array import array
+from collections import namedtuple
+from typing import Dict, Tuple
+
+#: The directions of the neighbours on a keyboard with staggered rows,
+#: as (column, row) offsets: each row is shifted to the right by half a
+#: key from the row above.
+SLANTED = ((-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1))
+#: The directions of the neighbours on a keypad.
+ALIGNED = ((-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1))
+
+#: A walk found in a password: the name of the layout, the position of
+#: the first character, the number of characters, of changes of
+#: direction and of bends, the changes of direction which do not go
+#: back to the direction before the previous one like in a zigzag.
+Walk = namedtuple("Walk", ["layout", "start", "length", "turns", "bends"])
+
+
+class Layout:
+    """
+    The adjacency graph of a keyboard layout.
+
+    :param rows: The unshifted rows of keys, from top to bottom. Spaces
+        stand for missing keys.
+    :param shifted_rows: The same rows typed with shift, if any.
+    :param directions: :py:data:`SLANTED` or :py:data:`ALIGNED`."""
+
+    def __init__(self, name, rows, shifted_rows=(), directions=SLANTED):
+        self.name = name
+        self.directions = len(directions)
+        #: Maps characters to key ids.
+        self.keys = {}
+        positions: Dict[Tuple[int, int], int] = {}
+        for y, row in enumerate(rows):
+            for x, character in enumerate(row):
+                if character != " ":
+                    key = len(positions)
+                    positions[x, y] = key
+                    self.keys[character] = key
+        for y, row in enumerate(shifted_rows):
+            for x, character in enumerate(row):
+                if (x, y) in positions and character not in self.keys:
+                    self.keys[character] = positions[x, y]
+        #: The neighbour of each key in each direction, ``-1`` if none.
+        self.neighbours = array("h", [-1] * (len(positions) * self.directions))
+        for (x, y), key in positions.items():
+            for direction, (dx, dy) in enumerate(directions):
+                neighbour = positions.get((x + dx, y + dy), -1)
+                self.neighbours[key * self.directions + direction] = neighbour
+
+    def direction(self, first, second):
+        """
+        Returns the direction from key ``first`` to key ``second``, or
+        ``-1`` if they are not adjacent."""
+        start = first * self.directions
+        for direction in range(self.directions):
+            if self.neighbours[start + direction] == second:
+                return direction
+        return -1
+
+    def walks(self, password):
+        """Yields the walks of at least two characters of ``password``."""
+        keys = self.keys
+        start = turns = bends = 0
+        previous_key = previous_direction = older_direction = -1
+        for position, character in enumerate(password):
+            key = keys.get(character, -1)
+            direction = -1
+            if key >= 0 and previous_key >= 0:
+                direction = self.direction(previous_key, key)
+            if direction < 0:
+                if position - start > 1:
+                    yield Walk(self.name, start, position - start, turns, bends)
+                start, turns, bends = position, 0, 0
+            elif previous_direction >= 0 and direction != previous_direction:
+                turns += 1
+                if direction != older_direction:
+                    bends += 1
+            older_direction = previous_direction
+            previous_key, previous_direction = key, direction
+        if len(password) - start > 1:
+            yield Walk(self.name, start, len(password) - start, turns, bends)
+
+    def longest_walk(self, password):
+        """Returns the longest walk of ``password``, or ``None``."""
+        return max(self.walks(password), key=lambda walk: walk.length, default=None)
+
+
+#: The available layouts by name. The rows of letters start one column
+#: to the right of the row of digits, e.g. ``q`` lies between ``1`` and
+#: ``2`` on a QWERTY keyboard.
+LAYOUTS = {
+    "qwerty": Layout(
+        "qwerty",
+        ["`1234567890-=", " qwertyuiop[]\\", " asdfghjkl;'", " zxcvbnm,./"],
+        ["~!@#$%^&*()_+", " QWERTYUIOP{}|", ' ASDFGHJKL:"', " ZXCVBNM<>?"],
+    ),
+    "qwertz": Layout(
+        "qwertz",
+        [
+            "^1234567890\xdf\xb4",
+            " qwertzuiop\xfc+",
+            " asdfghjkl\xf6\xe4#",
+            "<yxcvbnm,.-",
+        ],
+        [
+            '\xb0!"\xa7$%&/()=?`',
+            " QWERTZUIOP\xdc*",
+            " ASDFGHJKL\xd6\xc4'",
+            ">YXCVBNM;:_",
+        ],
+    ),
+    "azerty": Layout(
+        "azerty",
+        [
+            "\xb2&\xe9\"'(-\xe8_\xe7\xe0)=",
+            " azertyuiop^$",
+            " qsdfghjklm\xf9*",
+            "<wxcvbn,;:!",
+        ],
+        [
+            "\xb31234567890\xb0+",
+            " AZERTYUIOP\xa8\xa3",
+            " QSDFGHJKLM%\xb5",
+            ">WXCVBN?./\xa7",
+        ],
+    ),
+    "keypad": Layout(
+        "keypad", [" /*-", "789+", "456", "123", "0 ."], directions=ALIGNED
+    ),
+}
+
+
+def walks(password, layouts):
+    """Yields the walks of ``password`` on the named layouts."""
+    for name in layouts:
+        yield from LAYOUTS[name].walks(password)
+
+
+def longest_walk(password, layouts):
+    """Returns the longest walk of ``password`` on any of the named layouts."""
+    return max(walks(password, layouts), key=lambda walk: walk.length, default=None)
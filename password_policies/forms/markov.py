@@ -0,0 +1,139 @@
+"""
+Character n-gram Markov models for the :validator:`MarkovValidator`.
+
+A model estimates how likely a password is to be chosen by a person:
+it is trained on a corpus of passwords and scores a password with the
+number of bits needed to encode it, character after character, knowing
+the previous ``order - 1`` characters. Common passwords and passwords
+built like them cost few bits, random ones many.
+
+The counts of the n-grams and of their contexts are hashed into two
+tables of ``2 ** bits`` slots, so the size of a model does not depend
+on the size of the corpus. Each slot holds ``log2(1 + count / k)``
+quantized to an unsigned 16-bit integer, where ``k`` is the smoothing
+added to each count, from which the cost of a character is::
+
+    log2(alphabet) + (contexts[context] - ngrams[ngram]) / SCALE
+
+A model is stored as a header followed by both tables and is opened
+with :py:mod:`mmap`. Scoring a password does two table lookups per
+character.
+
+Layout (little endian)::
+
+    header       see HEADER
+    ngrams       2 ** bits x uint16
+    contexts     2 ** bits x uint16"""
+import math
+import struct
+import zlib
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from password_policies.forms.files import atomic_write, map_file
+
+#: Identifies Markov models.
+MAGIC = b"PPMARK"
+#: Incremented whenever the layout or the hashing changes.
+VERSION = 1
+#: Magic, version, order, number of bits of the tables, size of the
+#: alphabet and number of n-grams counted.
+HEADER = struct.Struct("<6sHHHIQ")
+#: The number of steps per bit of the quantized tables.
+SCALE = 64
+#: The count added to every n-gram.
+SMOOTHING = 0.1
+#: Pads the start of passwords.
+START = "\x02"
+#: Marks the end of passwords.
+END = "\x03"
+
+
+def get_slot(ngram, mask):
+    """Returns the slot of an n-gram in a table."""
+    return zlib.crc32(ngram.encode("utf-8")) & mask
+
+
+def quantize(counts, smoothing):
+    """Returns ``log2(1 + count / smoothing)`` of ``counts`` as uint16."""
+    if numpy is not None:
+        values = numpy.frombuffer(counts, dtype=numpy.uint32)
+        values = numpy.rint(numpy.log2(1 + values / smoothing) * SCALE)
+        values = numpy.minimum(values, 0xFFFF).astype(numpy.uint16)
+        return array("H", values.tobytes())
+    return array(
+        "H",
+        [
+            min(round(math.log2(1 + count / smoothing) * SCALE), 0xFFFF)
+            for count in counts
+        ],
+    )
+
+
+def build_model(passwords, output, order=3, bits=20):
+    """
+    Trains a model of the given order on ``passwords``, lowercased, and
+    writes it to ``output``.
+
+    :returns: The number of passwords read."""
+    if order < 1:
+        raise ValueError("The order must be at least 1.")
+    if not 8 <= bits <= 28:
+        raise ValueError("The number of bits must be between 8 and 28.")
+    mask = (1 << bits) - 1
+    ngrams = array("I", bytes(4 << bits))
+    contexts = array("I", bytes(4 << bits))
+    alphabet = {END}
+    count = total = 0
+    for password in passwords:
+        password = password.lower()
+        alphabet.update(password)
+        text = START * (order - 1) + password + END
+        for stop in range(order, len(text) + 1):
+            ngrams[get_slot(text[stop - order : stop], mask)] += 1
+            contexts[get_slot(text[stop - order : stop - 1], mask)] += 1
+        count += 1
+        total += len(text) - order + 1
+    ngrams = quantize(ngrams, SMOOTHING)
+    contexts = quantize(contexts, SMOOTHING * len(alphabet))
+    with atomic_write(output) as target:
+        target.write(HEADER.pack(MAGIC, VERSION, order, bits, len(alphabet), total))
+        target.write(ngrams.tobytes())
+        target.write(contexts.tobytes())
+    return count
+
+
+class MarkovModel:
+    """A read-only Markov model."""
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer, (self.order, self.bits, self.alphabet, self.count) = map_file(
+            path, HEADER, MAGIC, VERSION, "Markov model"
+        )
+        size = 2 << self.bits
+        view = memoryview(self.buffer)
+        start = HEADER.size
+        self.ngrams = view[start : start + size].cast("H")
+        self.contexts = view[start + size : start + 2 * size].cast("H")
+
+    def __len__(self):
+        return self.count
+
+    def score(self, password):
+        """Returns the number of bits needed to encode ``password``."""
+        order, mask = self.order, (1 << self.bits) - 1
+        ngrams, contexts = self.ngrams, self.contexts
+        text = START * (order - 1) + password.lower() + END
+        base = math.log2(self.alphabet) * SCALE
+        steps = 0
+        for stop in range(order, len(text) + 1):
+            context = contexts[get_slot(text[stop - order : stop - 1], mask)]
+            ngram = ngrams[get_slot(text[stop - order : stop], mask)]
+            # Hash collisions may add up the counts of other n-grams.
+            steps += max(base + context - ngram, 0)
+        return steps / SCALE
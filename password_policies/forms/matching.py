@@ -0,0 +1,789 @@
+"""
+Helpers to find haystacks similar to a password without comparing the
+password to every single haystack.
+
+A password (`needle`) is similar to a `haystack` if
+``(longest - distance) / longest >= threshold``, where ``longest`` is the
+length of the longer of both strings and ``distance`` the edit distance
+between the needle and the closest substring of the haystack (see
+:py:meth:`~password_policies.forms.validators.BaseSimilarityValidator.fuzzy_substring`).
+
+An index returns *candidates*: every haystack similar to the needle is
+returned, but not every candidate is similar. The validators verify the
+candidates and therefore take exactly the same decisions with or
+without an index."""
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from array import array
+from collections import Counter, defaultdict
+from concurrent import futures
+from typing import Dict, List, Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def max_distance(longest, threshold):
+    """
+    Returns the largest distance for which two strings with the given
+    longest length are still considered similar, or ``-1`` if no
+    distance is small enough."""
+    distance = max(int(longest * (1 - threshold)), -1)
+    while distance >= 0 and (longest - distance) / longest < threshold:
+        distance -= 1
+    while distance < longest and (longest - distance - 1) / longest >= threshold:
+        distance += 1
+    return distance
+
+
+def fuzzy_substring(needle, haystack, max_distance=None):
+    """
+    Returns the edit distance between ``needle`` and the closest
+    substring of ``haystack``.
+
+    If ``max_distance`` is given the computation stops as soon as every
+    cell of a row exceeds it (Ukkonen's cut-off); the value returned is
+    then larger than ``max_distance`` but not the exact distance."""
+    m, n = len(needle), len(haystack)
+
+    if m == 1:
+        if needle not in haystack:
+            return -1
+    if not n:
+        return m
+
+    row1 = [0] * (n + 1)
+    for i in range(0, m):
+        row2 = [i + 1]
+        for j in range(0, n):
+            cost = needle[i] != haystack[j]
+            row2.append(min(row1[j + 1] + 1, row2[j] + 1, row1[j] + cost))
+        row1 = row2
+        if max_distance is not None:
+            # The minimum of a row never decreases in later rows.
+            lowest = min(row1)
+            if lowest > max_distance:
+                return lowest
+    return min(row1)
+
+
+def myers_substring(needle, haystack, max_distance=None):
+    """
+    Returns the same distance as :py:func:`fuzzy_substring` using
+    `Myers' bit-vector algorithm`_: a whole column of the DP matrix is
+    computed per character of the haystack, using one bit per character
+    of the needle.
+
+    ``max_distance`` is accepted for compatibility; the exact distance
+    is always returned.
+
+    .. _`Myers' bit-vector algorithm`: https://doi.org/10.1145/316542.316550"""
+    m, n = len(needle), len(haystack)
+
+    if m == 1:
+        if needle not in haystack:
+            return -1
+    if not n:
+        return m
+    if not m:
+        return 0
+
+    peq = pattern_masks(needle)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    best = m
+    for character in haystack:
+        eq = peq.get(character, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+            if score < best:
+                best = score
+        # No carry into the first row: a match may start anywhere.
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return best
+
+
+def pattern_masks(needle):
+    """
+    Returns a dictionary mapping each character of ``needle`` to the
+    bitmask of its positions, see :py:func:`myers_substring`."""
+    peq: Dict[str, int] = {}
+    for i, character in enumerate(needle):
+        peq[character] = peq.get(character, 0) | 1 << i
+    return peq
+
+
+def myers_distance(peq, m, text):
+    """
+    Returns the Levenshtein distance between ``text`` and a needle of
+    length ``m`` given by its :py:func:`pattern_masks`, with the same
+    bit-vector algorithm as :py:func:`myers_substring`. The masks are
+    computed once to compare a needle to many strings."""
+    if not m:
+        return len(text)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for character in text:
+        eq = peq.get(character, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # The first row counts the characters of the text inserted.
+        ph = (ph << 1 | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+#: The available distance kernels by name.
+KERNELS = {
+    "dp": fuzzy_substring,
+    "myers": myers_substring,
+}
+
+
+def group_by_length(haystacks):
+    """
+    Returns a dictionary mapping lengths to lists of lowercased haystacks.
+
+    Haystacks already grouped by length, like a
+    :py:class:`~password_policies.forms.dictionaries.CompiledDictionary`,
+    return their own buckets."""
+    if hasattr(haystacks, "by_length"):
+        return haystacks.by_length()
+    buckets = defaultdict(list)
+    for haystack in haystacks:
+        haystack = haystack.lower()
+        buckets[len(haystack)].append(haystack)
+    return dict(buckets)
+
+
+def bucket_distance(m, n, threshold):
+    """
+    Returns the largest edit distance between a needle of length ``m``
+    and a substring of a haystack of length ``n`` if both are similar.
+
+    Returns ``None`` if the length alone makes a match impossible and
+    ``-1`` if every haystack of this length is similar to the needle."""
+    distance = max_distance(max(m, n), threshold)
+    if distance < 0 or n < m - distance:
+        return None
+    if m <= distance:
+        # Deleting the whole needle is cheap enough.
+        return -1
+    return distance
+
+
+class LengthIndex:
+    """
+    Groups the haystacks by length and skips the lengths that cannot
+    match a needle, comparing it to every other haystack.
+
+    The buckets of a
+    :py:class:`~password_policies.forms.dictionaries.PackedStrings` are
+    searched for the needle's q-grams in their encoded words first, see
+    :py:class:`QGramIndex`, and only the words sharing enough q-grams
+    with the needle are decoded."""
+
+    #: The length of the q-grams searched in packed buckets.
+    q = 2
+
+    def __init__(self, haystacks):
+        self.buckets = group_by_length(haystacks)
+
+    def candidates(self, needle, threshold):
+        """Yields the haystacks possibly similar to ``needle``."""
+        m, q = len(needle), self.q
+        grams = [needle[i : i + q] for i in range(m - q + 1)]
+        for n, words in self.buckets.items():
+            distance = bucket_distance(m, n, threshold)
+            if distance is None:
+                continue
+            if distance < 0:
+                yield words[0]
+                continue
+            minimum = m - q + 1 - q * distance
+            if minimum > 0 and hasattr(words, "search"):
+                yield from words.search(grams, minimum)
+            else:
+                yield from words
+
+
+class BKTree:
+    """
+    A `BK-tree`_ over a sequence of strings using the Levenshtein
+    distance: the strings ``k`` edits away from a node are in the
+    subtree of its child of edge ``k``. A search for the strings at
+    most ``radius`` edits away from a needle only descends into the
+    edges between ``distance - radius`` and ``distance + radius``,
+    where ``distance`` is the distance between the needle and the node.
+
+    The nodes are the positions of the strings in ``words``; their
+    first child, next sibling and edge are kept in arrays rather than
+    in an object per node.
+
+    .. _`BK-tree`: https://en.wikipedia.org/wiki/BK-tree"""
+
+    def __init__(self, words):
+        self.words = words
+        count = len(words)
+        self.children = array("i", [-1]) * count
+        self.siblings = array("i", [-1]) * count
+        self.edges = array("I", [0]) * count
+        for position in range(1, count):
+            self.add(position)
+
+    def add(self, position):
+        """Links the string at ``position`` into the tree rooted at 0."""
+        words, children, siblings, edges = (
+            self.words,
+            self.children,
+            self.siblings,
+            self.edges,
+        )
+        word = words[position]
+        peq, m = pattern_masks(word), len(word)
+        node = 0
+        while True:
+            distance = myers_distance(peq, m, words[node])
+            child = children[node]
+            while child >= 0 and edges[child] != distance:
+                child = siblings[child]
+            if child < 0:
+                edges[position] = distance
+                siblings[position] = children[node]
+                children[node] = position
+                return
+            node = child
+
+    def search(self, needle, radius):
+        """Yields the strings at most ``radius`` edits away from ``needle``."""
+        words, children, siblings, edges = (
+            self.words,
+            self.children,
+            self.siblings,
+            self.edges,
+        )
+        peq, m = pattern_masks(needle), len(needle)
+        stack = [0] if len(words) else []
+        while stack:
+            node = stack.pop()
+            word = words[node]
+            distance = myers_distance(peq, m, word)
+            if distance <= radius:
+                yield word
+            low, high = distance - radius, distance + radius
+            child = children[node]
+            while child >= 0:
+                if low <= edges[child] <= high:
+                    stack.append(child)
+                child = siblings[child]
+
+
+class BKTreeIndex(LengthIndex):
+    """
+    Keeps a :py:class:`BKTree` of the haystacks of each length.
+
+    A needle ``d`` edits away from a substring of a haystack of length
+    ``n`` is at most ``2 * d + n - m`` edits away from the haystack
+    itself, so each tree is searched with this radius and only returns
+    the haystacks within it. The radius grows with the length of the
+    haystacks: the trees skip most haystacks as long as it stays below
+    a few edits, and mostly save comparing the needle to the other
+    haystacks with the (slower) distance kernels."""
+
+    def __init__(self, haystacks):
+        super().__init__(haystacks)
+        self.trees = {n: BKTree(words) for n, words in self.buckets.items()}
+
+    def candidates(self, needle, threshold):
+        """Yields the haystacks possibly similar to ``needle``."""
+        m = len(needle)
+        for n, words in self.buckets.items():
+            distance = bucket_distance(m, n, threshold)
+            if distance is None:
+                continue
+            if distance < 0:
+                yield words[0]
+                continue
+            radius = 2 * distance + n - m
+            if radius >= max(m, n):
+                # Every haystack is within the radius.
+                yield from words
+            else:
+                yield from self.trees[n].search(needle, radius)
+
+
+class QGramIndex:
+    """
+    An inverted index from the q-grams (substrings of length ``q``) to
+    the haystacks containing them.
+
+    If a needle of length ``m`` is at most ``d`` edits away from a
+    substring of a haystack, at least ``m - q + 1 - q * d`` of the
+    needle's q-grams occur in the haystack. Haystacks sharing fewer
+    q-grams with the needle are discarded without comparing them.
+
+    The index holds the positions of the haystacks in ``haystacks``,
+    which must be a sequence, not copies of them: the words of a
+    :py:class:`~password_policies.forms.dictionaries.PackedStrings` are
+    only decoded when they are returned."""
+
+    def __init__(self, haystacks, q=3):
+        self.q = q
+        self.haystacks = haystacks
+        buckets = defaultdict(list)
+        lengths = array("I")
+        postings = defaultdict(list)
+        for word_id, haystack in enumerate(haystacks):
+            haystack = haystack.lower()
+            lengths.append(len(haystack))
+            buckets[len(haystack)].append(word_id)
+            for gram in {haystack[i : i + q] for i in range(len(haystack) - q + 1)}:
+                postings[gram].append(word_id)
+        self.lengths = lengths
+        self.buckets = {n: array("I", ids) for n, ids in buckets.items()}
+        self.postings = {gram: array("I", ids) for gram, ids in postings.items()}
+
+    def candidates(self, needle, threshold):
+        """Yields the haystacks possibly similar to ``needle``."""
+        m, q = len(needle), self.q
+        required = {}
+        for n, ids in self.buckets.items():
+            distance = bucket_distance(m, n, threshold)
+            if distance is None:
+                continue
+            minimum = m - q + 1 - q * distance
+            if distance < 0:
+                yield self.word(ids[0])
+            elif minimum <= 0:
+                # Too few q-grams to filter on.
+                for word_id in ids:
+                    yield self.word(word_id)
+            else:
+                required[n] = minimum
+        if not required:
+            return
+        counts: Counter = Counter()
+        for i in range(m - q + 1):
+            counts.update(self.postings.get(needle[i : i + q], ()))
+        lengths = self.lengths
+        for word_id, count in counts.items():
+            minimum = required.get(lengths[word_id])
+            if minimum is not None and count >= minimum:
+                yield self.word(word_id)
+
+    def word(self, word_id):
+        """Returns the lowercased haystack at position ``word_id``."""
+        return self.haystacks[word_id].lower()
+
+    def memory_usage(self):
+        """
+        Returns the approximate amount of bytes used by the index, not
+        counting the haystacks."""
+        usage = sys.getsizeof(self.lengths) + sys.getsizeof(self.postings)
+        for gram, ids in self.postings.items():
+            usage += sys.getsizeof(gram) + sys.getsizeof(ids)
+        usage += sum(sys.getsizeof(ids) for ids in self.buckets.values())
+        return usage
+
+
+class NumpyIndex(LengthIndex):
+    """
+    Encodes the haystacks of each length into a matrix of code points
+    and computes the distances to all haystacks of a length at once,
+    one vectorized step per character of the needle.
+
+    Only the similar haystacks are returned as candidates. Without
+    `NumPy`_ this index behaves like :py:class:`LengthIndex`.
+
+    .. _`NumPy`: https://numpy.org"""
+
+    def __init__(self, haystacks):
+        super().__init__(haystacks)
+        self.matrices = {}
+        if numpy is None:
+            return
+        for n, words in self.buckets.items():
+            if n:
+                codes = numpy.frombuffer("".join(words).encode("utf-32-le"), "<u4")
+                # One row per position, one column per haystack.
+                self.matrices[n] = numpy.ascontiguousarray(
+                    codes.reshape(len(words), n).T
+                )
+
+    def candidates(self, needle, threshold):
+        """Yields the haystacks similar to ``needle``."""
+        if numpy is None:
+            yield from super().candidates(needle, threshold)
+            return
+        m = len(needle)
+        for n, words in self.buckets.items():
+            distance = bucket_distance(m, n, threshold)
+            if distance is None:
+                continue
+            if distance < 0:
+                yield words[0]
+                continue
+            for position in self.within(needle, self.matrices[n], distance):
+                yield words[position]
+
+    def within(self, needle, matrix, distance):
+        """
+        Returns the positions of the haystacks encoded in ``matrix`` at
+        most ``distance`` edits away from ``needle``, see
+        :py:func:`fuzzy_substring`."""
+        n, count = matrix.shape
+        # No cell exceeds the length of the needle.
+        dtype = numpy.int8 if len(needle) < 127 else numpy.int32
+        one = dtype(1)
+        positions = numpy.arange(count)
+        row = numpy.zeros((n + 1, count), dtype=dtype)
+        step = numpy.empty_like(row)
+        for i, character in enumerate(needle):
+            step[0] = i + 1
+            numpy.add(row[:-1], matrix != ord(character), out=step[1:])
+            numpy.minimum(step[1:], row[1:] + one, out=step[1:])
+            for j in range(1, n + 1):
+                numpy.minimum(step[j], step[j - 1] + one, out=step[j])
+            row, step = step, row
+            alive = row.min(axis=0) <= distance
+            if not alive.all():
+                alive = numpy.flatnonzero(alive)
+                matrix, row = matrix[:, alive], row[:, alive]
+                positions = positions[alive]
+                step = numpy.empty_like(row)
+                if not len(positions):
+                    break
+        return positions
+
+
+class SuffixAutomaton:
+    """
+    A generalized `suffix automaton`_ of a list of strings: it accepts
+    every substring of any of the strings, and finds the longest
+    substring of a text occurring in any of them in a single pass over
+    the text.
+
+    .. _`suffix automaton`: https://en.wikipedia.org/wiki/Suffix_automaton"""
+
+    def __init__(self, strings=()):
+        # Per state: the transitions, the suffix link and the length of
+        # the longest substring reaching it.
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.links = [-1]
+        self.lengths = [0]
+        self.strings = strings = list(strings)
+        for string in strings:
+            last = 0
+            for character in string:
+                last = self.extend(last, character)
+        #: Per state: a bitmask of the strings containing its substrings.
+        self.owners = [0] * len(self.lengths)
+        for position, string in enumerate(strings):
+            bit = 1 << position
+            state = 0
+            for character in string:
+                state = self.transitions[state][character]
+                # The suffixes of a substring occur in the same strings.
+                suffix = state
+                while suffix > 0 and not self.owners[suffix] & bit:
+                    self.owners[suffix] |= bit
+                    suffix = self.links[suffix]
+
+    def add_state(self, length, transitions=None, link=-1):
+        self.transitions.append(dict(transitions or {}))
+        self.links.append(link)
+        self.lengths.append(length)
+        return len(self.lengths) - 1
+
+    def clone(self, p, q, character):
+        """Splits state ``q`` reached from ``p`` with ``character``."""
+        transitions, links = self.transitions, self.links
+        clone = self.add_state(self.lengths[p] + 1, transitions[q], links[q])
+        while p != -1 and transitions[p].get(character) == q:
+            transitions[p][character] = clone
+            p = links[p]
+        links[q] = clone
+        return clone
+
+    def extend(self, last, character):
+        """Appends ``character`` to the string ending in state ``last``."""
+        transitions, links, lengths = self.transitions, self.links, self.lengths
+        q = transitions[last].get(character)
+        if q is not None:
+            # The string is a substring of a previous one.
+            if lengths[last] + 1 == lengths[q]:
+                return q
+            return self.clone(last, q, character)
+        current = self.add_state(lengths[last] + 1)
+        p = last
+        while p != -1 and character not in transitions[p]:
+            transitions[p][character] = current
+            p = links[p]
+        if p == -1:
+            links[current] = 0
+        else:
+            q = transitions[p][character]
+            if lengths[p] + 1 == lengths[q]:
+                links[current] = q
+            else:
+                links[current] = self.clone(p, q, character)
+        return current
+
+    def __contains__(self, string):
+        state = 0
+        for character in string:
+            state = self.transitions[state].get(character, -1)
+            if state < 0:
+                return False
+        return True
+
+    def matches(self, text):
+        """
+        Yields, for each position of ``text``, the length of the longest
+        substring ending there which is a substring of one of the
+        strings, and the state reached (``0`` if there is none)."""
+        transitions, links, lengths = self.transitions, self.links, self.lengths
+        state = length = 0
+        for character in text:
+            while state and character not in transitions[state]:
+                state = links[state]
+                length = lengths[state]
+            state = transitions[state].get(character, 0)
+            length = length + 1 if state else 0
+            yield length, state
+
+    def longest_run(self, text):
+        """
+        Returns the length of the longest substring of ``text`` which is
+        a substring of one of the strings."""
+        return max((length for length, state in self.matches(text)), default=0)
+
+    def longest_runs(self, text):
+        """
+        Returns, for each string, the length of the longest substring of
+        ``text`` which is a substring of it."""
+        links, lengths, owners = self.links, self.lengths, self.owners
+        runs = [0] * len(self.strings)
+        for length, state in self.matches(text):
+            # Shorter suffixes of the run may occur in more strings.
+            while state > 0:
+                length = min(length, lengths[state])
+                owned = owners[state]
+                while owned:
+                    bit = owned & -owned
+                    position = bit.bit_length() - 1
+                    if runs[position] < length:
+                        runs[position] = length
+                    owned ^= bit
+                state = links[state]
+        return runs
+
+
+# The shard of haystacks and cancellation flags of a ProcessPoolIndex
+# worker.
+_worker_haystacks: Sequence[str] = ()
+_worker_cancelled: Sequence[int] = ()
+
+
+def _initialize_worker(haystacks, cancelled):
+    global _worker_haystacks, _worker_cancelled
+    _worker_haystacks = haystacks
+    _worker_cancelled = cancelled
+
+
+def _scan_shard(slot, start, stop, needle, threshold, kernel):
+    """
+    Returns the first haystack between the positions ``start`` and
+    ``stop`` of the worker's haystacks similar to ``needle``, or
+    ``None``. Gives up once the scan of ``slot`` is cancelled."""
+    kernel = KERNELS[kernel]
+    haystacks, cancelled = _worker_haystacks, _worker_cancelled
+    m = len(needle)
+    for position in range(start, stop):
+        if not position % 256 and cancelled[slot]:
+            return None
+        haystack = haystacks[position].lower()
+        if bucket_distance(m, len(haystack), threshold) is None:
+            continue
+        longest = max(m, len(haystack))
+        distance = kernel(needle, haystack, max_distance(longest, threshold))
+        if (longest - distance) / longest >= threshold:
+            return haystack
+    return None
+
+
+def get_shard(haystacks, start, stop):
+    """
+    Returns the haystacks from position ``start`` to ``stop``, using
+    their own ``shard`` method if any, like
+    :py:meth:`~password_policies.forms.dictionaries.PackedStrings.shard`."""
+    if hasattr(haystacks, "shard"):
+        return haystacks.shard(start, stop)
+    return haystacks[start:stop]
+
+
+class ProcessPoolIndex:
+    """
+    Compares a needle to every haystack like a linear scan, but splits
+    the haystacks into shards scanned in parallel by a pool of
+    processes. The processes are started on the first search and kept;
+    each process receives its own shards once, when it starts, and
+    scans only those.
+
+    Only the first similar haystack found is returned as candidate: the
+    remaining shards are then cancelled.
+
+    :param processes: The size of the pool, defaults to the number of
+        CPUs.
+    :param kernel: The name of the distance kernel, see
+        :py:data:`KERNELS`.
+    :param concurrency: The number of searches which can run at once;
+        further searches wait."""
+
+    #: The number of shards per process.
+    shards_per_process = 4
+
+    def __init__(self, haystacks, processes=None, kernel="dp", concurrency=8):
+        self.haystacks = haystacks
+        self.processes = processes or os.cpu_count() or 1
+        self.kernel = kernel
+        self.executors = None
+        self.lock = threading.Lock()
+        context = multiprocessing.get_context()
+        # One flag per concurrent search, set to cancel its shards.
+        self.cancelled = context.Array("b", concurrency, lock=False)
+        self.slots: queue.Queue = queue.Queue()
+        for slot in range(concurrency):
+            self.slots.put(slot)
+        count = len(haystacks)
+        shards = min(self.processes * self.shards_per_process, count) or 1
+        self.shards = [
+            (count * shard // shards, count * (shard + 1) // shards)
+            for shard in range(shards)
+        ]
+        # The process scanning each shard, in order.
+        workers = min(self.processes, shards)
+        self.workers = [shard * workers // shards for shard in range(shards)]
+
+    def get_executors(self):
+        """Returns the pools of the workers, starting them on first use."""
+        if self.executors is None:
+            with self.lock:
+                if self.executors is None:
+                    self.executors = [
+                        self.start_worker(worker)
+                        for worker in range(self.workers[-1] + 1)
+                    ]
+        return self.executors
+
+    def start_worker(self, worker):
+        """
+        Starts the process scanning the shards of ``worker``.
+
+        :returns: A tuple of the position of its first haystack and its
+            pool."""
+        shards = [
+            shard for shard, owner in zip(self.shards, self.workers) if owner == worker
+        ]
+        start, stop = shards[0][0], shards[-1][1]
+        executor = futures.ProcessPoolExecutor(
+            1,
+            initializer=_initialize_worker,
+            initargs=(get_shard(self.haystacks, start, stop), self.cancelled),
+        )
+        return start, executor
+
+    def candidates(self, needle, threshold):
+        """Yields a haystack similar to ``needle``, if any."""
+        haystack = self.search(needle, threshold)
+        if haystack is not None:
+            yield haystack
+
+    def search(self, needle, threshold):
+        """Returns the first haystack found similar to ``needle``, or ``None``."""
+        executors = self.get_executors()
+        slot = self.slots.get()
+        self.cancelled[slot] = 0
+        pending = []
+        for worker, (start, stop) in zip(self.workers, self.shards):
+            offset, executor = executors[worker]
+            pending.append(
+                executor.submit(
+                    _scan_shard,
+                    slot,
+                    start - offset,
+                    stop - offset,
+                    needle,
+                    threshold,
+                    self.kernel,
+                )
+            )
+        try:
+            for future in futures.as_completed(pending):
+                haystack = future.result()
+                if haystack is not None:
+                    return haystack
+            return None
+        finally:
+            self.cancel(slot, pending)
+            futures.wait(pending)
+            self.slots.put(slot)
+
+    def cancel(self, slot, pending):
+        """Cancels the shards of a search."""
+        self.cancelled[slot] = 1
+        for future in pending:
+            future.cancel()
+
+    def close(self):
+        """Shuts the pool down."""
+        with self.lock:
+            if self.executors is not None:
+                for _offset, executor in self.executors:
+                    executor.shutdown()
+                self.executors = None
+
+
+#: The available indexes by name.
+INDEXES = {
+    "length": LengthIndex,
+    "bktree": BKTreeIndex,
+    "qgram": QGramIndex,
+    "numpy": NumpyIndex,
+    "processes": ProcessPoolIndex,
+}
+
+
+def build_index(name, haystacks, **options):
+    """
+    Builds the index called ``name`` over the given haystacks, passing
+    ``options`` to its constructor."""
+    try:
+        index_class = INDEXES[name]
+    except KeyError:
+        raise ValueError("Unknown similarity index %r." % name)
+    return index_class(haystacks, **options)
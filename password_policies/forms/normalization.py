@@ -0,0 +1,51 @@
+"""
+Canonical variants of a password, undoing common disguises of words
+and sequences: leetspeak (``p@ssw0rd``), reversal (``drowssap``) and
+shifted keys on a US keyboard (``!@#$%`` for ``12345``).
+
+The variants are computed with translation tables built once, see
+:py:meth:`str.maketrans`, and their number is bounded by
+:py:data:`MAX_VARIANTS`."""
+
+_leet = {
+    "@": "a",
+    "4": "a",
+    "8": "b",
+    "(": "c",
+    "3": "e",
+    "6": "g",
+    "9": "g",
+    "#": "h",
+    "1": "i",
+    "!": "i",
+    "0": "o",
+    "$": "s",
+    "5": "s",
+    "7": "t",
+    "+": "t",
+    "2": "z",
+}
+#: Replaces leetspeak characters by the letters they stand for.
+LEET = str.maketrans(_leet)
+#: Like :py:data:`LEET`, reading ``1``, ``!`` and ``|`` as ``l``.
+LEET_L = str.maketrans({**_leet, "1": "l", "!": "l", "|": "l"})
+#: Replaces the characters typed with shift on a US keyboard by the
+#: characters of the same keys.
+UNSHIFT = str.maketrans('~!@#$%^&*()_+{}|:"<>?', "`1234567890-=[]\\;',./")
+#: The tables applied to the lowercased password.
+TABLES = (LEET, LEET_L, UNSHIFT)
+#: The maximum number of variants of a password.
+MAX_VARIANTS = 2 * (len(TABLES) + 1)
+
+
+def get_variants(lowercase):
+    """
+    Returns the distinct variants of a lowercased password: the password
+    and its translations by each of :py:data:`TABLES`, each of them
+    forwards and reversed. The password comes first."""
+    variants = []
+    for translated in [lowercase] + [lowercase.translate(table) for table in TABLES]:
+        for variant in (translated, translated[::-1]):
+            if variant not in variants:
+                variants.append(variant)
+    return variants
@@ -1,15 +1,53 @@
-import itertools
 import math
 import re
-import stringprep
-import unicodedata
-
-from django.core.exceptions import ValidationError
-from django.utils.encoding import force_str, smart_str
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet, List, Optional, Union
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.utils.encoding import force_str
+from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import ngettext
 
 from password_policies.conf import settings
+from password_policies.forms import analysis as analysis_module
+from password_policies.forms import dictionaries, guesses, keyboards, matching
+from password_policies.forms.analysis import PasswordAnalysis, category_mask
+from password_policies.forms.bloom import BloomFilter
+from password_policies.forms.entropy import get_model as get_entropy_model
+from password_policies.forms.hashes import HashList
+from password_policies.forms.markov import MarkovModel
+from password_policies.forms.normalization import get_variants
+
+
+class LazyLoadMixin:
+    """
+    Loads the data of a validator, like a dictionary or a file mapped
+    into memory, on the first validation. The data is loaded once even
+    if several threads validate passwords at the same time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def load(self):
+        """
+        Loads the data with :py:meth:`load_data`, unless this was done
+        before. Called on the first validation; call it explicitly to
+        pay the cost before serving requests."""
+        loaded = self._loaded
+        if loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    self._loaded = self.load_data()
+                loaded = self._loaded
+        return loaded
+
+    def load_data(self):
+        """Returns the data of the validator."""
+        raise NotImplementedError
 
 
 class BaseCountValidator:
@@ -19,17 +57,24 @@ class BaseCountValidator:
     :class:`~django.core.exceptions.ValidationError` if the count
     is less than :py:func:`~BaseCountValidator.get_min_count`."""
 
+    #: The unicode categories counted, set by the subclasses.
+    categories: List[str]
+    _category_mask = None
+
     def __call__(self, value):
         if not self.get_min_count():
             return
-        counter = 0
-        for character in force_str(value):
-            category = unicodedata.category(character)
-            if category in self.categories:
-                counter += 1
+        analysis = PasswordAnalysis.from_value(value)
+        counter = analysis.count_mask(self.get_category_mask())
         if counter < self.get_min_count():
             raise ValidationError(self.get_error_message(), code=self.code)
 
+    def get_category_mask(self):
+        """Returns a bitmask of the validator's unicode categories."""
+        if self._category_mask is None:
+            self._category_mask = category_mask(self.categories)
+        return self._category_mask
+
     def get_error_message(self):
         """Returns the error message of this validator."""
         raise NotImplementedError
@@ -44,42 +89,27 @@ class BaseRFC4013Validator:
     Validates that a given password passes the requirements as
     defined in `RFC 4013`_.
 
-    .. _`RFC 4013`: http://tools.ietf.org/html/rfc4013"""
+    The characters are looked up in a table of their stringprep flags
+    built once (see
+    :py:func:`~password_policies.forms.analysis.get_stringprep_table`).
+    Validators keep no state between calls and can be shared by
+    threads.
 
-    first = ""
-    invalid = True
-    l_cat = False
-    last = ""
-    r_and_al_cat = False
+    .. _`RFC 4013`: http://tools.ietf.org/html/rfc4013"""
 
     def __call__(self, value):
-        value = force_str(value)
-        self.first = value[0]
-        self.last = value[:-1]
-        self._process(value)
-
-    def _process(self, value):
-        for code in force_str(value):
-            # TODO: Is this long enough?
-            if (
-                stringprep.in_table_c12(code)
-                or stringprep.in_table_c21_c22(code)
-                or stringprep.in_table_c3(code)
-                or stringprep.in_table_c4(code)
-                or stringprep.in_table_c5(code)
-                or stringprep.in_table_c6(code)
-                or stringprep.in_table_c7(code)
-                or stringprep.in_table_c8(code)
-                or stringprep.in_table_c9(code)
-            ):
-                self.invalid = False
-            if stringprep.in_table_d1(code):
-                self.r_and_al_cat = True
-            if stringprep.in_table_d2(code):
-                self.l_cat = True
+        analysis = PasswordAnalysis.from_value(value)
+        if analysis:
+            self.validate_flags(analysis.flags)
 
+    def validate_flags(self, flags):
+        """
+        Validates the stringprep flags of the characters of a non-empty
+        password, see :py:data:`~password_policies.forms.analysis.PROHIBITED`."""
+        raise NotImplementedError
 
-class BaseSimilarityValidator:
+
+class BaseSimilarityValidator(LazyLoadMixin):
     """
     Compares a `needle` to a `haystack` (list of strings) and calculates
     a similarity between 0.0 and 1.0.
@@ -90,43 +120,103 @@ class BaseSimilarityValidator:
 
     # Taken from django-passwords
 
+    #: The validator's error code, set by the subclasses.
+    code: str
+    #: The validator's error message, set by the subclasses.
+    message: str
     #: A list of strings.
     haystacks = []  # type:ignore
+    #: The name of the index used to find similar haystacks, see
+    #: :py:data:`password_policies.forms.matching.INDEXES`.
+    index = "length"
 
-    def __init__(self, haystacks=[]):
+    def __init__(self, haystacks=[], index=None):
         if haystacks:
             self.haystacks = haystacks
+        if index:
+            self.index = index
+        super().__init__()
 
     def __call__(self, value):
-        needle = force_str(value)
-        for haystack in self.haystacks:
-            distance = self.fuzzy_substring(needle, haystack)
-            longest = max(len(needle), len(haystack))
-            similarity = (longest - distance) / longest
-            if similarity >= self.get_threshold():
-                raise ValidationError(
-                    self.message % {"haystacks": ", ".join(self.haystacks)},
-                    code=self.code,
-                )
+        self.validate_haystacks(value, *self.load())
+
+    def validate_haystacks(self, value, haystacks, index):
+        """
+        Compares a password to the loaded haystacks, using the index to
+        find the candidates."""
+        threshold = self.get_threshold()
+        for needle in self.get_needles(PasswordAnalysis.from_value(value)):
+            if len(needle) < 2:
+                candidates = haystacks
+            else:
+                candidates = index.candidates(needle, threshold)
+            for haystack in candidates:
+                if self.is_similar(needle, haystack, threshold):
+                    raise ValidationError(
+                        self.get_error_message(haystacks), code=self.code
+                    )
+
+    def get_needles(self, analysis):
+        """
+        Returns the strings compared to the haystacks: the lowercased
+        password."""
+        return [analysis.lowercase]
+
+    def get_error_message(self, haystacks):
+        """
+        Returns :py:attr:`message`. The haystacks are only joined if the
+        message refers to them, which is costly for large dictionaries."""
+        if "%(haystacks)" in str(self.message):
+            return self.message % {"haystacks": ", ".join(haystacks)}
+        return self.message
 
-    def fuzzy_substring(self, needle, haystack):
-        needle, haystack = needle.lower(), haystack.lower()
-        m, n = len(needle), len(haystack)
-
-        if m == 1:
-            if needle not in haystack:
-                return -1
-        if not n:
-            return m
-
-        row1 = [0] * (n + 1)
-        for i in range(0, m):
-            row2 = [i + 1]
-            for j in range(0, n):
-                cost = needle[i] != haystack[j]
-                row2.append(min(row1[j + 1] + 1, row2[j] + 1, row1[j] + cost))
-            row1 = row2
-        return min(row1)
+    def get_haystacks(self):
+        """Returns the haystacks to compare passwords to."""
+        return self.haystacks
+
+    def load_data(self):
+        """
+        Loads the haystacks and builds the index, see
+        :py:meth:`~LazyLoadMixin.load`.
+
+        :returns: A tuple of the haystacks and the index."""
+        return self.build(self.get_haystacks())
+
+    def build(self, haystacks):
+        """
+        Builds the index over the haystacks.
+
+        :returns: A tuple of the haystacks and the index."""
+        index = matching.build_index(self.index, haystacks, **self.get_index_options())
+        return haystacks, index
+
+    def get_index_options(self):
+        """
+        Returns the keyword arguments passed to the index: the kernel set
+        in :py:attr:`~password_policies.conf.Settings.PASSWORD_SIMILARITY_KERNEL`
+        for the ``"processes"`` index."""
+        if self.index == "processes":
+            return {"kernel": settings.PASSWORD_SIMILARITY_KERNEL}
+        return {}
+
+    def fuzzy_substring(self, needle, haystack, max_distance=None):
+        """
+        Returns the edit distance between the needle and the closest
+        substring of the haystack, ignoring case, using the kernel set in
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_SIMILARITY_KERNEL`.
+        See :py:func:`password_policies.forms.matching.fuzzy_substring`."""
+        kernel = matching.KERNELS[settings.PASSWORD_SIMILARITY_KERNEL]
+        return kernel(needle.lower(), haystack.lower(), max_distance)
+
+    def is_similar(self, needle, haystack, threshold):
+        """
+        Returns whether the similarity of the needle and the haystack
+        reaches ``threshold``."""
+        longest = max(len(needle), len(haystack))
+        distance = self.fuzzy_substring(
+            needle, haystack, matching.max_distance(longest, threshold)
+        )
+        return (longest - distance) / longest >= threshold
 
     def get_threshold(self):
         """
@@ -153,20 +243,124 @@ class BidirectionalValidator(BaseRFC4013Validator):
     #: The validator's error message.
     message = _("The new password contains ambiguous bidirectional characters.")
 
-    def __call__(self, value):
-        super().__call__(value)
-        if self.r_and_al_cat:
+    def validate_flags(self, flags):
+        union = 0
+        for flag in set(flags):
+            union |= flag
+        if union & analysis_module.RAND_AL_CAT:
             if (
-                self.l_cat
-                or not stringprep.in_table_d1(self.first)
-                or not stringprep.in_table_d1(self.last)
+                union & analysis_module.L_CAT
+                or not flags[0] & analysis_module.RAND_AL_CAT
+                or not flags[-1] & analysis_module.RAND_AL_CAT
             ):
                 raise ValidationError(self.message, code=self.code)
 
 
+class BlocklistValidator(LazyLoadMixin):
+    """
+    Validates that a given password is not in a blocklist, stored as a
+    :py:mod:`Bloom filter <password_policies.forms.bloom>`.
+
+    Unlike the :validator:`DictionaryValidator` only exact matches are
+    rejected, but checking a password costs the same whatever the size
+    of the blocklist.
+
+    .. note::
+        If :py:attr:`~BlocklistValidator.blocklist` is empty or set
+        to None validation is not performed.
+
+    .. warning::
+        A small fraction of the passwords not in the blocklist, set
+        when building the filter, are rejected too."""
+
+    #: A path to a Bloom filter written by the ``build_password_blocklist``
+    #: management command. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_BLOCKLIST`.
+    blocklist: Optional[str] = ""
+    #: The validator's error code.
+    code = "invalid_blocklisted_password"
+    #: The validator's error message.
+    message = _("The new password is not allowed, please choose another one.")
+
+    def __init__(self, blocklist=None):
+        if blocklist is None:
+            self.blocklist = settings.PASSWORD_BLOCKLIST
+        else:
+            self.blocklist = blocklist
+        super().__init__()
+
+    def __call__(self, value):
+        if not self.blocklist:
+            return
+        if force_str(value) in self.load():
+            raise ValidationError(self.message, code=self.code)
+
+    def load_data(self):
+        """
+        Opens the Bloom filter, see :py:meth:`~LazyLoadMixin.load`.
+
+        :returns: A :py:class:`~password_policies.forms.bloom.BloomFilter`."""
+        return BloomFilter(self.blocklist)
+
+
+class BreachedPasswordValidator(LazyLoadMixin):
+    """
+    Validates that a given password is not in a list of hashes of
+    breached passwords, see :py:mod:`password_policies.forms.hashes`.
+
+    .. note::
+        If :py:attr:`~BreachedPasswordValidator.hashes` is empty or set
+        to None validation is not performed.
+
+    .. note::
+        The hash list is mapped into memory on the first validation and
+        searched without reading it, so its size does not matter."""
+
+    #: The validator's error code.
+    code = "invalid_breached_password"
+    #: A path to a hash list written by the ``convert_password_hashes``
+    #: management command. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_BREACHED_HASHES`.
+    hashes: Optional[str] = ""
+    #: The validator's error message.
+    message = _("The new password has appeared in a data breach.")
+
+    def __init__(self, hashes=None):
+        if hashes is None:
+            self.hashes = settings.PASSWORD_BREACHED_HASHES
+        else:
+            self.hashes = hashes
+        super().__init__()
+
+    def __call__(self, value):
+        if not self.hashes:
+            return
+        if self.load().contains_password(force_str(value)):
+            raise ValidationError(self.message, code=self.code)
+
+    def load_data(self):
+        """
+        Opens the hash list, see :py:meth:`~LazyLoadMixin.load`.
+
+        :returns: A :py:class:`~password_policies.forms.hashes.HashList`."""
+        return HashList(self.hashes)
+
+
 class CommonSequenceValidator(BaseSimilarityValidator):
     """
-    Validates that a given password is not based on a common sequence of characters."""
+    Validates that a given password is not based on a common sequence of characters.
+
+    The sequences, reversed and forwards, are compiled into a
+    :py:class:`~password_policies.forms.matching.SuffixAutomaton` which
+    finds the longest run of the password found in each sequence in a
+    single pass. A password at most ``d`` edits away from a sequence
+    keeps a run of at least ``(length - d) / (d + 1)`` of its
+    characters, so only the sequences this run can match are compared
+    to the password like by the other similarity validators (see
+    :py:attr:`~password_policies.conf.Settings.PASSWORD_MATCH_THRESHOLD`).
+    A password is also rejected if the run is at least
+    :py:attr:`~password_policies.conf.Settings.PASSWORD_COMMON_SEQUENCES_MIN_RUN`
+    characters long."""
 
     # Taken from django-passwords
 
@@ -175,6 +369,46 @@ class CommonSequenceValidator(BaseSimilarityValidator):
     #: The validator's error message.
     message = _("The new password is based on a common sequence of characters.")
 
+    def __call__(self, value):
+        analysis = PasswordAnalysis.from_value(value)
+        if not analysis:
+            return
+        haystacks, automaton = self.load()
+        threshold = self.get_threshold()
+        min_run = settings.PASSWORD_COMMON_SEQUENCES_MIN_RUN or math.inf
+        for needle in self.get_needles(analysis):
+            m = len(needle)
+            runs = automaton.longest_runs(needle)
+            if max(runs, default=0) >= min_run:
+                raise ValidationError(self.get_error_message(haystacks), code=self.code)
+            for sequence, run in zip(automaton.strings, runs):
+                distance = matching.max_distance(max(m, len(sequence)), threshold)
+                if m >= 2 and run * (distance + 1) < m - distance:
+                    continue
+                if self.is_similar(needle, sequence, threshold):
+                    raise ValidationError(
+                        self.get_error_message(haystacks), code=self.code
+                    )
+
+    def build(self, haystacks):
+        """
+        Compiles the lowercased haystacks and their reversals.
+
+        :returns: A tuple of the haystacks and the automaton."""
+        sequences = [haystack.lower() for haystack in haystacks]
+        sequences += [sequence[::-1] for sequence in sequences]
+        return haystacks, matching.SuffixAutomaton(sequences)
+
+    def get_needles(self, analysis):
+        """
+        Returns the lowercased password and, if
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_MATCH_VARIANTS`
+        is set, its variants (see
+        :py:func:`~password_policies.forms.normalization.get_variants`)."""
+        if settings.PASSWORD_MATCH_VARIANTS:
+            return get_variants(analysis.lowercase)
+        return super().get_needles(analysis)
+
 
 class ConsecutiveCountValidator:
     """
@@ -186,11 +420,8 @@ class ConsecutiveCountValidator:
     def __call__(self, value):
         if not self.get_max_count():
             return
-        consecutive_found = False
-        for _idx, group in itertools.groupby(force_str(value)):
-            if len(list(group)) > self.get_max_count():
-                consecutive_found = True
-        if consecutive_found:
+        analysis = PasswordAnalysis.from_value(value)
+        if analysis.longest_run > self.get_max_count():
             msg = ngettext(
                 "The new password contains consecutive"
                 " characters. Only %(count)d consecutive character"
@@ -276,7 +507,11 @@ class CracklibValidator:
 class EntropyValidator:
     """
     Validates that a password contains varied characters by calculating
-    the Shannon entropy of a password."""
+    the entropy of a password, by default its Shannon entropy.
+
+    The entropy is measured by one of the models of
+    :py:mod:`password_policies.forms.entropy`, in a single pass over the
+    counts of the :py:class:`~password_policies.forms.analysis.PasswordAnalysis`."""
 
     # Taken from revelation
 
@@ -288,8 +523,17 @@ class EntropyValidator:
     #:
     #: If set to 0 validation will not be performed.
     long_min_entropy = settings.PASSWORD_MIN_ENTROPY_LONG
+    #: Specifies the minimum entropy of long passwords measured by the
+    #: ``"conditional"`` model. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_MIN_CONDITIONAL_ENTROPY_LONG`.
+    #:
+    #: If set to 0 validation will not be performed.
+    long_min_conditional_entropy = settings.PASSWORD_MIN_CONDITIONAL_ENTROPY_LONG
     #: The validator's error message.
     message = _("The new password is not varied enough.")
+    #: The name of the entropy model. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_ENTROPY_MODEL`.
+    model = settings.PASSWORD_ENTROPY_MODEL
     #: Specifies the minimum entropy of short passwords
     #: (len(password) < 100). Defaults to
     #: :py:attr:`password_policies.conf.Settings.PASSWORD_MIN_ENTROPY_SHORT`.
@@ -298,38 +542,48 @@ class EntropyValidator:
     short_min_entropy = settings.PASSWORD_MIN_ENTROPY_SHORT
 
     def __call__(self, value):
-        pwlen = len(value)
-        if pwlen < 100 and not self.short_min_entropy:
-            return
-        else:
-            if not self.long_min_entropy:
+        analysis = PasswordAnalysis.from_value(value)
+        pwlen = len(analysis)
+        long_min_entropy = self.get_long_min_entropy()
+        if pwlen < 100:
+            if not self.short_min_entropy:
                 return
-        ent = self.entropy(value)
-        idealent = self.entropy_ideal(pwlen)
+        elif not long_min_entropy:
+            return
+        ent, idealent = self.measure(analysis)
         try:
             ent_quotient = ent / idealent
         except ZeroDivisionError:
             ent_quotient = 0
         if (pwlen < 100 and ent_quotient < self.short_min_entropy) or (
-            pwlen >= 100 and ent < self.long_min_entropy
+            pwlen >= 100 and ent < long_min_entropy
         ):
             raise ValidationError(self.message, code=self.code)
 
+    def get_long_min_entropy(self):
+        """
+        Returns the minimum entropy of long passwords calibrated for
+        :py:attr:`model`: :py:attr:`long_min_conditional_entropy` for
+        the ``"conditional"`` model, else :py:attr:`long_min_entropy`."""
+        if self.model == "conditional":
+            return self.long_min_conditional_entropy
+        return self.long_min_entropy
+
+    def measure(self, string):
+        """
+        Returns the entropy of a string and the ideal entropy of a
+        string of the same length according to :py:attr:`model`, in bits
+        per character."""
+        model = get_entropy_model(self.model)
+        return model(PasswordAnalysis.from_value(string))
+
     def entropy(self, string):
-        # Calculates the Shannon entropy of a string
-        #
-        # get probability of chars in string
-        prob = [
-            float(string.count(c)) / len(string) for c in dict.fromkeys(list(string))
-        ]
-        # calculate the entropy
-        entropy = -sum([p * math.log(p) / math.log(2.0) for p in prob])
-        return entropy
+        """Returns the entropy of a string according to :py:attr:`model`."""
+        return self.measure(string)[0]
 
     def entropy_ideal(self, length):
-        # Calculates the ideal Shannon entropy of a string with given length
-        prob = 1.0 / length
-        return -1.0 * length * prob * math.log(prob) / math.log(2.0)
+        """Returns the ideal Shannon entropy of a string with given length."""
+        return math.log2(length)
 
 
 class DictionaryValidator(BaseSimilarityValidator):
@@ -345,12 +599,55 @@ class DictionaryValidator(BaseSimilarityValidator):
         This validator is very time consuming and validation
         duration depends on the amount of lines in the dictionary
         file. The larger the dictionary file, the longer validation
-        takes!"""
+        takes! Setting
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARY_INDEX`
+        to ``"qgram"`` or ``"bktree"`` only compares a password to a
+        fraction of the words, at the cost of building the index. With
+        NumPy installed ``"numpy"`` compares a password to all words of
+        a length at once. ``"processes"`` compares a password to all
+        words using a pool of processes.
+
+    .. note::
+        The dictionary is read and indexed on the first validation.
+        Call :py:meth:`~DictionaryValidator.load` or
+        :py:func:`warm_up` to do it when a process starts.
+
+    .. note::
+        Before comparing a password to the words, the password and its
+        variants without digits and symbols are looked up as they are,
+        which rejects e.g. ``Dragon2024!`` at once. Leetspeak, reversed
+        and shifted variants like ``P@ssw0rd`` or ``drowssap`` are looked
+        up too. See
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARY_EXACT_MATCH`
+        and :py:attr:`~password_policies.conf.Settings.PASSWORD_MATCH_VARIANTS`.
+
+    .. note::
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARIES`
+        maps languages to dictionary files. The file of the active
+        language is then used instead of
+        :py:attr:`~DictionaryValidator.dictionary`; each is read on its
+        first use.
+
+    .. note::
+        Changed dictionary files are read again in a background thread,
+        without restarting the process, if
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARY_RELOAD_SECONDS`
+        is set.
+
+    .. note::
+        If :py:attr:`~DictionaryValidator.compiled` is set the words are
+        read from a compiled dictionary (see the
+        ``compile_password_dictionary`` management command) mapped into
+        memory instead. It is compiled again if the dictionary file or
+        the words changed."""
 
     # Taken from django-passwords
 
     #: The validator's error code.
     code = "invalid_dictionary_word"
+    #: A path to a compiled dictionary. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_DICTIONARY_COMPILED`.
+    compiled: Optional[str] = ""
     #: A path to a file with one word per line. Defaults to
     #: :py:attr:`password_policies.conf.Settings.PASSWORD_DICTIONARY`.
     dictionary = ""
@@ -359,6 +656,336 @@ class DictionaryValidator(BaseSimilarityValidator):
     #: A list of unicode strings. Defaults to
     #: :py:attr:`password_policies.conf.Settings.PASSWORD_WORDS`.
     words = []  # type:ignore
+    #: The minimum length of a variant of the password looked up in the
+    #: dictionary, see :py:meth:`~DictionaryValidator.get_variants`.
+    exact_min_length = 4
+    #: Matches leading and trailing digits and symbols.
+    edges_regex = re.compile(r"^[\W\d_]+|[\W\d_]+$")
+    #: Matches digits and symbols.
+    non_letters_regex = re.compile(r"[\W\d_]+")
+
+    def __init__(self, dictionary="", words=[], index=None, compiled=None):
+        if compiled is None:
+            self.compiled = settings.PASSWORD_DICTIONARY_COMPILED
+        else:
+            self.compiled = compiled
+        if not dictionary:
+            self.dictionary = settings.PASSWORD_DICTIONARY
+        else:
+            self.dictionary = dictionary
+        if not words:
+            self.words = settings.PASSWORD_WORDS
+        else:
+            self.words = words
+        if index is None:
+            index = settings.PASSWORD_DICTIONARY_INDEX
+        super().__init__(index=index)
+        self._exact = None
+        self._languages = OrderedDict()
+        # Per dictionary (None for the default one): the size and
+        # modification time when it was read, the time of the next
+        # check and wether it is being reloaded.
+        self._stats = {}
+        self._checks = {}
+        self._reloading = set()
+        # Per loaded dictionary: the number of validations using it, and
+        # the replaced or dropped ones left to close by their last user.
+        self._users = {}
+        self._retired = {}
+        # Per language dictionary being built: the lock its first
+        # validations wait on.
+        self._building = {}
+
+    def __call__(self, value):
+        loaded = self.acquire()
+        try:
+            haystacks, index = loaded
+            if settings.PASSWORD_DICTIONARY_EXACT_MATCH:
+                exact = self.get_exact_words(haystacks)
+                for variant in self.get_variants(PasswordAnalysis.from_value(value)):
+                    if variant in exact:
+                        raise ValidationError(self.message, code=self.code)
+            self.validate_haystacks(value, haystacks, index)
+        finally:
+            self.release(loaded)
+
+    def get_variants(self, analysis):
+        """
+        Returns the lowercased password, without leading and trailing
+        digits and symbols and without any digits and symbols, skipping
+        variants shorter than :py:attr:`exact_min_length`.
+
+        If :py:attr:`~password_policies.conf.Settings.PASSWORD_MATCH_VARIANTS`
+        is set the same is done for each variant returned by
+        :py:func:`~password_policies.forms.normalization.get_variants`."""
+        lowercase = analysis.lowercase
+        if settings.PASSWORD_MATCH_VARIANTS:
+            # Strip digits and symbols first, they are not leetspeak.
+            stripped = self.edges_regex.sub("", lowercase)
+            passwords = get_variants(lowercase)
+            passwords += get_variants(stripped)
+        else:
+            passwords = [lowercase]
+        variants = []
+        for password in passwords:
+            for variant in (
+                password,
+                self.edges_regex.sub("", password),
+                self.non_letters_regex.sub("", password),
+            ):
+                if len(variant) >= self.exact_min_length and variant not in variants:
+                    variants.append(variant)
+        return variants
+
+    def get_exact_words(self, haystacks):
+        """
+        Returns a container of the lowercased haystacks for exact
+        lookups: the haystacks themselves if they already are
+        :py:class:`~password_policies.forms.dictionaries.PackedStrings`
+        (looked up by bisection), a :py:class:`frozenset` otherwise."""
+        exact = self._exact
+        if exact is None or exact[0] is not haystacks:
+            words: Union[dictionaries.PackedStrings, FrozenSet[str]]
+            if isinstance(haystacks, dictionaries.PackedStrings):
+                words = haystacks
+            else:
+                words = frozenset(haystack.lower() for haystack in haystacks)
+            exact = self._exact = (haystacks, words)
+        return exact[1]
+
+    def get_haystacks(self, dictionary=None):
+        """
+        Reads the dictionary file and returns its lines and
+        :py:attr:`~DictionaryValidator.words` as
+        :py:class:`~password_policies.forms.dictionaries.CompactStrings`,
+        or opens the :py:attr:`~DictionaryValidator.compiled` dictionary.
+
+        :param dictionary: A dictionary file read instead of
+            :py:attr:`~DictionaryValidator.dictionary`."""
+        self._stats[dictionary] = self.get_stat(dictionary)
+        if dictionary is None:
+            if self.compiled:
+                return dictionaries.open_compiled(
+                    self.compiled, self.dictionary, self.words
+                )
+            dictionary = self.dictionary
+        return dictionaries.CompactStrings(
+            dictionaries.read_words(dictionary, self.words)
+        )
+
+    def get_dictionary(self):
+        """
+        Returns the dictionary file of the active language in
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARIES`,
+        trying the language without its region too (``de`` for
+        ``de-at``), or ``None`` to use
+        :py:attr:`~DictionaryValidator.dictionary`."""
+        languages = settings.PASSWORD_DICTIONARIES
+        language = get_language()
+        if not languages or not language:
+            return None
+        return languages.get(language, languages.get(language.split("-")[0]))
+
+    def load(self):
+        """
+        Loads the haystacks and builds the index of the active language,
+        unless this was done before, see
+        :py:meth:`~DictionaryValidator.get_dictionary`. At most
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARIES_CACHE_SIZE`
+        languages are kept, the least recently used are dropped and
+        their index closed, see :py:meth:`~DictionaryValidator.discard`.
+        A language is built without blocking the validations of the
+        others.
+
+        :returns: A tuple of the haystacks and the index."""
+        dictionary = self.get_dictionary()
+        if dictionary is None:
+            loaded = super().load()
+        else:
+            loaded = self.load_language(dictionary)
+        self.check(dictionary)
+        return loaded
+
+    def load_language(self, dictionary):
+        """
+        Returns the haystacks and the index of a language dictionary
+        file, building them if they are not kept, see
+        :py:meth:`~DictionaryValidator.load`."""
+        with self._lock:
+            loaded = self._languages.get(dictionary)
+            if loaded is not None:
+                self._languages.move_to_end(dictionary)
+                return loaded
+            building = self._building.setdefault(dictionary, threading.Lock())
+        with building:
+            with self._lock:
+                loaded = self._languages.get(dictionary)
+            if loaded is not None:
+                return loaded
+            loaded = self.build(self.get_haystacks(dictionary))
+            dropped = []
+            with self._lock:
+                self._languages[dictionary] = loaded
+                del self._building[dictionary]
+                # Keep the new one, it is returned.
+                size = max(settings.PASSWORD_DICTIONARIES_CACHE_SIZE, 1)
+                while len(self._languages) > size:
+                    dropped.append(self._languages.popitem(last=False)[1])
+        for previous in dropped:
+            self.discard(previous)
+        return loaded
+
+    def acquire(self):
+        """
+        Loads the haystacks and the index like
+        :py:meth:`~DictionaryValidator.load` and marks them as used until
+        :py:meth:`~DictionaryValidator.release` is called: an index
+        replaced meanwhile is closed by its last user.
+
+        :returns: A tuple of the haystacks and the index."""
+        while True:
+            loaded = self.load()
+            with self._lock:
+                if loaded is self._loaded or any(
+                    loaded is other for other in self._languages.values()
+                ):
+                    key = id(loaded)
+                    self._users[key] = self._users.get(key, 0) + 1
+                    return loaded
+            # It was replaced since it was loaded, use the new one.
+
+    def release(self, loaded):
+        """
+        Marks the haystacks and the index returned by
+        :py:meth:`~DictionaryValidator.acquire` as no longer used by a
+        validation, closing the index if it was replaced."""
+        key = id(loaded)
+        with self._lock:
+            self._users[key] -= 1
+            if self._users[key]:
+                return
+            del self._users[key]
+            if self._retired.pop(key, None) is None:
+                return
+        self.discard(loaded)
+
+    def discard(self, loaded):
+        """
+        Closes the index of replaced or dropped haystacks, or leaves it
+        to the last validation using it, see
+        :py:meth:`~DictionaryValidator.acquire`."""
+        with self._lock:
+            if id(loaded) in self._users:
+                self._retired[id(loaded)] = loaded
+                return
+        index = loaded[1]
+        if hasattr(index, "close"):
+            index.close()
+
+    def get_stat(self, dictionary):
+        """
+        Returns the size and modification time of a dictionary file, see
+        :py:meth:`~DictionaryValidator.get_haystacks`."""
+        if dictionary is None:
+            dictionary = self.dictionary
+        try:
+            return dictionaries.file_stat(dictionary)
+        except OSError:
+            return None
+
+    def check(self, dictionary):
+        """
+        Reloads a dictionary file in the background if it changed since
+        it was read. Each file is checked at most once every
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARY_RELOAD_SECONDS`
+        seconds, never if it is not set."""
+        seconds = settings.PASSWORD_DICTIONARY_RELOAD_SECONDS
+        if not seconds:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._checks.get(dictionary, 0) or dictionary in self._reloading:
+                return
+            self._checks[dictionary] = now + seconds
+        stat = self.get_stat(dictionary)
+        if stat is None or stat == self._stats.get(dictionary):
+            return
+        with self._lock:
+            if dictionary in self._reloading:
+                return
+            self._reloading.add(dictionary)
+        thread = threading.Thread(target=self.reload, args=(dictionary,), daemon=True)
+        thread.start()
+
+    def reload(self, dictionary):
+        """
+        Reads a dictionary file and builds its index again, then replaces
+        the previous ones. Validations which already started keep using
+        the previous ones, see :py:meth:`~DictionaryValidator.discard`."""
+        try:
+            try:
+                loaded = self.build(self.get_haystacks(dictionary))
+            except Exception:
+                # Keep the previous dictionary and try again later.
+                self._stats.pop(dictionary, None)
+                return
+            with self._lock:
+                if dictionary is None:
+                    previous, self._loaded = self._loaded, loaded
+                elif dictionary in self._languages:
+                    previous = self._languages[dictionary]
+                    self._languages[dictionary] = loaded
+                else:
+                    previous = None
+            if previous is not None:
+                self.discard(previous)
+        finally:
+            with self._lock:
+                self._reloading.discard(dictionary)
+
+    def get_index_options(self):
+        """
+        Also passes the number of processes set in
+        :py:attr:`~password_policies.conf.Settings.PASSWORD_DICTIONARY_PROCESSES`
+        to the ``"processes"`` index."""
+        options = super().get_index_options()
+        if self.index == "processes":
+            options["processes"] = settings.PASSWORD_DICTIONARY_PROCESSES
+        return options
+
+
+class GuessesValidator(LazyLoadMixin):
+    """
+    Validates that a given password needs enough guesses to be found by
+    an attacker trying dictionary words, keyboard walks, repeats and
+    dates before brute force, see :py:mod:`password_policies.forms.guesses`.
+
+    It weighs the patterns found by the :validator:`DictionaryValidator`,
+    the :validator:`CommonSequenceValidator` and the
+    :validator:`EntropyValidator` in a single estimate: a password made
+    of a common word and a year is rejected, a long passphrase of less
+    common words is not.
+
+    The words are ranked by their position in
+    :py:attr:`~GuessesValidator.dictionary` and
+    :py:attr:`~GuessesValidator.words`, which should therefore be sorted
+    from the most to the least common word.
+
+    .. note::
+        The words are read on the first validation. Call
+        :py:meth:`~GuessesValidator.load` to do it when a process
+        starts."""
+
+    #: The validator's error code.
+    code = "invalid_guesses"
+    #: A path to a file with one word per line, the most common first.
+    #: Defaults to :py:attr:`password_policies.conf.Settings.PASSWORD_DICTIONARY`.
+    dictionary: Optional[str] = ""
+    #: The validator's error message.
+    message = _("The new password is too easy to guess.")
+    #: A list of unicode strings. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_WORDS`.
+    words = []  # type:ignore
 
     def __init__(self, dictionary="", words=[]):
         if not dictionary:
@@ -369,13 +996,38 @@ class DictionaryValidator(BaseSimilarityValidator):
             self.words = settings.PASSWORD_WORDS
         else:
             self.words = words
-        haystacks = []
-        if self.dictionary:
-            with open(self.dictionary) as dictionary:
-                haystacks.extend([smart_str(x.strip()) for x in dictionary.readlines()])
-        if self.words:
-            haystacks.extend(self.words)
-        super().__init__(haystacks=haystacks)
+        super().__init__()
+
+    def __call__(self, value):
+        min_guesses = self.get_min_guesses()
+        if not min_guesses:
+            return
+        if self.estimate(value).guesses < math.log10(min_guesses):
+            raise ValidationError(self.message, code=self.code)
+
+    def estimate(self, value):
+        """
+        Returns the
+        :py:data:`~password_policies.forms.guesses.Estimate` of a
+        password, see :py:func:`~password_policies.forms.guesses.estimate`."""
+        return guesses.estimate(
+            force_str(value),
+            self.load(),
+            settings.PASSWORD_KEYBOARD_LAYOUTS,
+            settings.PASSWORD_GUESSES_MAX_MATCHES,
+        )
+
+    def get_min_guesses(self):
+        """
+        :returns: :py:attr:`password_policies.conf.Settings.PASSWORD_MIN_GUESSES`"""
+        return settings.PASSWORD_MIN_GUESSES
+
+    def load_data(self):
+        """
+        Reads and ranks the words, see :py:meth:`~LazyLoadMixin.load`.
+
+        :returns: :py:class:`~password_policies.forms.guesses.RankedWords`."""
+        return guesses.RankedWords(dictionaries.read_words(self.dictionary, self.words))
 
 
 class InvalidCharacterValidator(BaseRFC4013Validator):
@@ -390,12 +1042,59 @@ class InvalidCharacterValidator(BaseRFC4013Validator):
     #: The validator's error message.
     message = _("The new password contains invalid unicode characters.")
 
-    def __call__(self, value):
-        super().__call__(value)
-        if self.invalid:
+    def validate_flags(self, flags):
+        if any(flag & analysis_module.PROHIBITED for flag in flags):
             raise ValidationError(self.message, code=self.code)
 
 
+class KeyboardWalkValidator:
+    """
+    Validates that a given password does not contain a walk over
+    adjacent keys of a keyboard, including diagonal and zigzag walks
+    like ``zaq1@wsx`` or ``qawsedrf`` which are not common sequences.
+
+    The layouts of
+    :py:attr:`~password_policies.conf.Settings.PASSWORD_KEYBOARD_LAYOUTS`
+    are compiled into adjacency arrays once (see
+    :py:mod:`password_policies.forms.keyboards`) and the password is
+    scanned in a single pass per layout. Each bend of a walk, a change
+    of direction which does not continue a zigzag, counts as one key
+    less, so that words typed over a few adjacent keys like ``Sweden``
+    are not rejected.
+
+    .. note::
+        If :py:attr:`password_policies.conf.Settings.PASSWORD_KEYBOARD_WALK_MIN_LENGTH`
+        is not set validation is not performed."""
+
+    #: The validator's error code.
+    code = "invalid_keyboard_walk"
+
+    def __call__(self, value):
+        min_length = self.get_min_length()
+        if not min_length:
+            return
+        walk = max(
+            keyboards.walks(force_str(value), settings.PASSWORD_KEYBOARD_LAYOUTS),
+            key=lambda walk: walk.length - walk.bends,
+            default=None,
+        )
+        if walk and walk.length - walk.bends >= min_length:
+            msg = ngettext(
+                "The new password contains a sequence of %(count)d adjacent"
+                " key on a keyboard.",
+                "The new password contains a sequence of %(count)d adjacent"
+                " keys on a keyboard.",
+                walk.length,
+            ) % {"count": walk.length}
+            raise ValidationError(msg, code=self.code)
+
+    def get_min_length(self):
+        """
+        :returns: :py:attr:`password_policies.conf.Settings.PASSWORD_KEYBOARD_WALK_MIN_LENGTH`
+        """
+        return settings.PASSWORD_KEYBOARD_WALK_MIN_LENGTH
+
+
 class LetterCountValidator(BaseCountValidator):
     """
     Counts the occurrences of letters and raises a
@@ -524,6 +1223,57 @@ Lu    Letter, Uppercase
         return settings.PASSWORD_MIN_UPPERCASE_LETTERS
 
 
+class MarkovValidator(LazyLoadMixin):
+    """
+    Validates that a given password is not predictable by a character
+    n-gram Markov model trained on common passwords, see
+    :py:mod:`password_policies.forms.markov`.
+
+    The model scores a password with the number of bits needed to
+    encode it. Passwords costing less than
+    :py:attr:`~password_policies.conf.Settings.PASSWORD_MARKOV_MIN_BITS`
+    are rejected. Scoring a password does two table lookups per
+    character, whatever the size of the corpus.
+
+    .. note::
+        If :py:attr:`~MarkovValidator.model` is empty or set to None
+        validation is not performed."""
+
+    #: The validator's error code.
+    code = "invalid_markov_strength"
+    #: The validator's error message.
+    message = _("The new password is too predictable, please choose another one.")
+    #: A path to a model written by the ``build_password_markov_model``
+    #: management command. Defaults to
+    #: :py:attr:`password_policies.conf.Settings.PASSWORD_MARKOV_MODEL`.
+    model: Optional[str] = ""
+
+    def __init__(self, model=None):
+        if model is None:
+            self.model = settings.PASSWORD_MARKOV_MODEL
+        else:
+            self.model = model
+        super().__init__()
+
+    def __call__(self, value):
+        if not self.model:
+            return
+        if self.load().score(force_str(value)) < self.get_min_bits():
+            raise ValidationError(self.message, code=self.code)
+
+    def get_min_bits(self):
+        """
+        :returns: :py:attr:`password_policies.conf.Settings.PASSWORD_MARKOV_MIN_BITS`"""
+        return settings.PASSWORD_MARKOV_MIN_BITS
+
+    def load_data(self):
+        """
+        Opens the model, see :py:meth:`~LazyLoadMixin.load`.
+
+        :returns: A :py:class:`~password_policies.forms.markov.MarkovModel`."""
+        return MarkovModel(self.model)
+
+
 class NotEmailValidator:
     """
     Validates that a given password is not similar to an email address."""
@@ -607,6 +1357,36 @@ No    Number, Other
         return settings.PASSWORD_MIN_NUMBERS
 
 
+class RepeatedSubstringValidator:
+    """
+    Validates that a given password is not mostly a repeated block of
+    characters, like ``abcabcabc!1`` or ``Password1password1``, which
+    the :validator:`ConsecutiveCountValidator` does not catch.
+
+    The longest repetition of the password is found with the prefix
+    function, see :py:func:`~password_policies.forms.analysis.find_repetition`."""
+
+    #: The validator's error code.
+    code = "invalid_repeated_substring"
+    #: The validator's error message.
+    message = _("The new password is mostly a repeated sequence of characters.")
+
+    def __call__(self, value):
+        max_coverage = self.get_max_coverage()
+        if max_coverage is None:
+            return
+        analysis = PasswordAnalysis.from_value(value)
+        repetition = analysis.repetition
+        if repetition and repetition.length > max_coverage * len(analysis):
+            raise ValidationError(self.message, code=self.code)
+
+    def get_max_coverage(self):
+        """
+        :returns: :py:attr:`password_policies.conf.Settings.PASSWORD_MAX_REPEATED_COVERAGE`
+        """
+        return settings.PASSWORD_MAX_REPEATED_COVERAGE
+
+
 class SymbolCountValidator(BaseCountValidator):
     """
     Counts the occurrences of other characters than letters and numbers,
@@ -679,16 +1459,129 @@ Zl    Separator, Line
         return settings.PASSWORD_MIN_SYMBOLS
 
 
+class UserAttributeValidator:
+    """
+    Validates that a given password is not similar to the attributes of
+    a user listed in
+    :py:attr:`~password_policies.conf.Settings.PASSWORD_USER_ATTRIBUTES`,
+    e.g. its username, or to their parts, e.g. the first name in
+    ``alice.smith@example.com``.
+
+    The password and its variants (see
+    :py:attr:`~password_policies.conf.Settings.PASSWORD_MATCH_VARIANTS`)
+    are compared with the same rule as the :validator:`DictionaryValidator`
+    (see :py:attr:`~password_policies.conf.Settings.PASSWORD_MATCH_THRESHOLD`),
+    stopping as soon as the distance exceeds the largest similar one.
+    Only the first :py:attr:`max_length` characters of an attribute and
+    its first :py:attr:`max_tokens` parts are compared, so the time
+    spent does not depend on the length of the attributes.
+
+    .. note::
+        Unlike the other validators it is called with the user, e.g. by
+        :py:meth:`password_policies.forms.PasswordPoliciesForm.clean_new_password1`.
+        Without a user validation is not performed."""
+
+    #: The validator's error code.
+    code = "invalid_user_attribute"
+    #: The number of characters of an attribute compared.
+    max_length = 64
+    #: The number of parts of an attribute compared.
+    max_tokens = 8
+    #: The validator's error message.
+    message = _("The new password is too similar to the %(verbose_name)s.")
+    #: The minimum length of the parts of an attribute compared.
+    min_token_length = 3
+    #: Splits attributes into parts.
+    split_regex = re.compile(r"[\W_]+")
+
+    def __call__(self, value, user=None):
+        if user is None:
+            return
+        analysis = PasswordAnalysis.from_value(value)
+        if settings.PASSWORD_MATCH_VARIANTS:
+            needles = get_variants(analysis.lowercase)
+        else:
+            needles = [analysis.lowercase]
+        threshold = settings.PASSWORD_MATCH_THRESHOLD
+        for name in settings.PASSWORD_USER_ATTRIBUTES:
+            for haystack in self.get_tokens(getattr(user, name, None)):
+                n = len(haystack)
+                for needle in needles:
+                    m = len(needle)
+                    distance = matching.max_distance(max(m, n), threshold)
+                    # The needle is at least m - n edits away from the
+                    # substrings of a shorter haystack.
+                    if distance < 0 or m - n > distance:
+                        continue
+                    found = matching.fuzzy_substring(needle, haystack, distance)
+                    if 0 <= found <= distance:
+                        verbose_name = self.get_verbose_name(user, name)
+                        raise ValidationError(
+                            self.message,
+                            code=self.code,
+                            params={"verbose_name": verbose_name},
+                        )
+
+    def get_tokens(self, value):
+        """
+        Returns the lowercased attribute, truncated to
+        :py:attr:`max_length` characters, and its parts of at least
+        :py:attr:`min_token_length` characters, at most
+        :py:attr:`max_tokens` strings in all."""
+        if not value:
+            return []
+        value = force_str(value).lower()[: self.max_length]
+        tokens = [value]
+        for token in self.split_regex.split(value):
+            if len(token) >= self.min_token_length and token not in tokens:
+                if len(tokens) >= self.max_tokens:
+                    break
+                tokens.append(token)
+        return tokens
+
+    def get_verbose_name(self, user, name):
+        """Returns the verbose name of an attribute of the user."""
+        try:
+            return user._meta.get_field(name).verbose_name
+        except (AttributeError, FieldDoesNotExist):
+            return name
+
+
 validate_bidirectional = BidirectionalValidator()
+validate_blocklist = BlocklistValidator()
+validate_breached_password = BreachedPasswordValidator()
 validate_common_sequences = CommonSequenceValidator(settings.PASSWORD_COMMON_SEQUENCES)
 validate_consecutive_count = ConsecutiveCountValidator()
 validate_cracklib = CracklibValidator()
 validate_dictionary_words = DictionaryValidator(dictionary=settings.PASSWORD_DICTIONARY)
 validate_entropy = EntropyValidator()
+validate_guesses = GuessesValidator()
 validate_invalid_character = InvalidCharacterValidator()
+validate_keyboard_walk = KeyboardWalkValidator()
 validate_letter_count = LetterCountValidator()
 validate_lowercase_letter_count = LowercaseLetterCountValidator()
 validate_uppercase_letter_count = UppercaseLetterCountValidator()
+validate_markov_strength = MarkovValidator()
 validate_not_email = NotEmailValidator()
 validate_number_count = NumberCountValidator()
+validate_repeated_substrings = RepeatedSubstringValidator()
 validate_symbol_count = SymbolCountValidator()
+validate_user_attributes = UserAttributeValidator()
+
+
+def warm_up():
+    """
+    Loads the data of the validators above, which is otherwise
+    done on the first validation. Call it when a process starts
+    (e.g. in a ``post_fork`` hook) to keep the first request fast."""
+    analysis_module.get_category_table()
+    analysis_module.get_stringprep_table()
+    validate_common_sequences.load()
+    validate_dictionary_words.load()
+    validate_guesses.load()
+    if validate_blocklist.blocklist:
+        validate_blocklist.load()
+    if validate_breached_password.hashes:
+        validate_breached_password.load()
+    if validate_markov_strength.model:
+        validate_markov_strength.load()
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from password_policies.conf import settings
+from password_policies.forms.bloom import build_filter
+from password_policies.forms.files import read_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds a Bloom filter of the passwords of a file (one per line) "
+        "read by the BlocklistValidator."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="The file with one password per line.")
+        parser.add_argument(
+            "--output",
+            default=settings.PASSWORD_BLOCKLIST,
+            help="The file to write. Defaults to PASSWORD_BLOCKLIST.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.001,
+            help="The fraction of other passwords rejected. Defaults to 0.001.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output:
+            raise CommandError("Set PASSWORD_BLOCKLIST or pass --output.")
+        source = options["source"]
+        try:
+            # The file is read twice to count the passwords first.
+            count = sum(1 for line in read_lines(source))
+            count = build_filter(
+                read_lines(source), output, options["error_rate"], count
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write("Added %d passwords to %s." % (count, output))
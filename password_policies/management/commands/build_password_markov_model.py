@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from password_policies.conf import settings
+from password_policies.forms.files import read_lines
+from password_policies.forms.markov import build_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Trains a character Markov model on the passwords of a file (one per "
+        "line) for the MarkovValidator."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="The file with one password per line.")
+        parser.add_argument(
+            "--output",
+            default=settings.PASSWORD_MARKOV_MODEL,
+            help="The file to write. Defaults to PASSWORD_MARKOV_MODEL.",
+        )
+        parser.add_argument(
+            "--order",
+            type=int,
+            default=3,
+            help="The length of the n-grams. Defaults to 3.",
+        )
+        parser.add_argument(
+            "--bits",
+            type=int,
+            default=20,
+            help="The tables hold 2 ** bits n-grams. Defaults to 20 (4 MiB).",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output:
+            raise CommandError("Set PASSWORD_MARKOV_MODEL or pass --output.")
+        try:
+            count = build_model(
+                read_lines(options["source"]),
+                output,
+                options["order"],
+                options["bits"],
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write("Trained %s on %d passwords." % (output, count))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from password_policies.conf import settings
+from password_policies.forms.dictionaries import compile_dictionary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles PASSWORD_DICTIONARY and PASSWORD_WORDS into the file "
+        "read by the DictionaryValidator."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.PASSWORD_DICTIONARY_COMPILED,
+            help="The file to write. Defaults to PASSWORD_DICTIONARY_COMPILED.",
+        )
+        parser.add_argument(
+            "--dictionary",
+            default=settings.PASSWORD_DICTIONARY,
+            help="The dictionary file. Defaults to PASSWORD_DICTIONARY.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output:
+            raise CommandError("Set PASSWORD_DICTIONARY_COMPILED or pass --output.")
+        try:
+            count = compile_dictionary(
+                options["dictionary"], settings.PASSWORD_WORDS, output
+            )
+        except OSError as error:
+            raise CommandError(error)
+        self.stdout.write("Compiled %d words into %s." % (count, output))
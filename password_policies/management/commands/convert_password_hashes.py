@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from password_policies.conf import settings
+from password_policies.forms.hashes import ALGORITHMS, convert_hashes
+
+
+class Command(BaseCommand):
+    help = (
+        "Converts a dump of hashes of breached passwords (one HASH or "
+        "HASH:COUNT per line) into the file read by the "
+        "BreachedPasswordValidator."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="The dump to convert.")
+        parser.add_argument(
+            "--output",
+            default=settings.PASSWORD_BREACHED_HASHES,
+            help="The file to write. Defaults to PASSWORD_BREACHED_HASHES.",
+        )
+        parser.add_argument(
+            "--algorithm",
+            choices=sorted(ALGORITHMS),
+            default="sha1",
+            help="The algorithm of the hashes. Defaults to sha1.",
+        )
+        parser.add_argument(
+            "--plain",
+            action="store_true",
+            help="The dump contains one password per line, which are hashed.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output:
+            raise CommandError("Set PASSWORD_BREACHED_HASHES or pass --output.")
+        try:
+            with open(options["source"], encoding="utf-8") as source:
+                count = convert_hashes(
+                    source, output, options["algorithm"], options["plain"]
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write("Converted %d hashes into %s." % (count, output))
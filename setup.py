@@ -19,7 +19,7 @@ and a mechanism to force password changes.
     author_email="michal.dtz@gmail.com",
     url="https://github.com/iplweb/django-password-policies-iplweb",
     include_package_data=True,
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     zip_safe=False,
     classifiers=[
         "Development Status :: 3 - Alpha",
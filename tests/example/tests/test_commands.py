@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from password_policies.forms import dictionaries, validators
+from password_policies.forms.bloom import BloomFilter, build_filter
+from password_policies.forms.hashes import HashList, convert_hashes, sha1
+from password_policies.forms.markov import MarkovModel, build_model
+
+
+class CommandTestCase(TestCase):
+    """
+    Runs a management command writing :py:attr:`output` from the lines
+    of :py:attr:`source`, both in a temporary directory."""
+
+    #: The name of the command.
+    command = ""
+    #: The names of the source and output files.
+    source_name = "source.txt"
+    output_name = "output"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, self.source_name)
+        self.output = os.path.join(self.directory, self.output_name)
+        with open(self.source, "w", encoding="utf-8") as source:
+            source.write("".join(line + "\n" for line in self.get_lines()))
+        return super().setUp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        return super().tearDown()
+
+    def get_lines(self):
+        """Returns the lines of the source file."""
+        return []
+
+    def call(self, *args, **options):
+        """Runs the command writing the output file and returns its output."""
+        out = StringIO()
+        call_command(self.command, *args, output=self.output, stdout=out, **options)
+        return out.getvalue()
+
+    def assertInvalid(self, *args, **options):
+        """Asserts that the command fails with these arguments."""
+        with self.assertRaises(CommandError):
+            self.call(*args, **options)
+
+    def assertDecisions(self, validator, allowed=(), rejected=()):
+        """Asserts that ``validator`` allows and rejects these passwords."""
+        for password in allowed:
+            validator(password)
+        for password in rejected:
+            with self.assertRaises(ValidationError):
+                validator(password)
+
+
+class CompilePasswordDictionaryTest(CommandTestCase):
+    command = "compile_password_dictionary"
+    source_name = "words.txt"
+    output_name = "words.dict"
+
+    def setUp(self):
+        super().setUp()
+        self.dictionary = self.source
+
+    def get_lines(self):
+        return ["Password", "dragon", "sunshine", "password", "\xe9t\xe9"]
+
+    def test_compile(self):
+        out = self.call(dictionary=self.dictionary)
+        self.assertIn("Compiled 4 words", out)
+        compiled = dictionaries.CompiledDictionary(self.output)
+        self.assertEqual(
+            list(compiled), ["\xe9t\xe9", "dragon", "password", "sunshine"]
+        )
+        self.assertIn("dragon", compiled)
+        self.assertNotIn("dragons", compiled)
+        self.assertEqual(list(compiled.by_length()[8]), ["password", "sunshine"])
+
+    def test_requires_output(self):
+        with self.assertRaises(CommandError):
+            call_command("compile_password_dictionary", dictionary=self.dictionary)
+
+    def test_permissions(self):
+        self.call(dictionary=self.dictionary)
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(self.output).st_mode & 0o777, 0o666 & ~umask)
+
+    def test_stale_dictionary_is_compiled_again(self):
+        compiled = dictionaries.open_compiled(self.output, self.dictionary, [])
+        self.assertFalse(compiled.is_stale(self.dictionary, []))
+        self.assertTrue(compiled.is_stale(self.dictionary, ["letmein"]))
+        with open(self.dictionary, "a", encoding="utf-8") as dictionary:
+            dictionary.write("letmein\n")
+        self.assertTrue(compiled.is_stale(self.dictionary, []))
+        self.assertIn(
+            "letmein", dictionaries.open_compiled(self.output, self.dictionary, [])
+        )
+
+    def test_missing_dictionary_keeps_compiled(self):
+        dictionaries.open_compiled(self.output, self.dictionary, [])
+        os.remove(self.dictionary)
+        compiled = dictionaries.open_compiled(self.output, self.dictionary, [])
+        self.assertFalse(compiled.is_stale(self.dictionary, []))
+        self.assertIn("dragon", compiled)
+
+    def test_invalid_file_is_compiled_again(self):
+        with open(self.output, "wb") as output:
+            output.write(b"garbage")
+        self.assertIn(
+            "dragon", dictionaries.open_compiled(self.output, self.dictionary, [])
+        )
+
+    def test_validation(self):
+        for index in ("length", "bktree", "qgram", "numpy"):
+            validator = validators.DictionaryValidator(
+                dictionary=self.dictionary, index=index, compiled=self.output
+            )
+            self.assertDecisions(validator, ["Chad+pher9k"], ["SunShine"])
+            self.assertIsInstance(validator.load()[0], dictionaries.CompiledDictionary)
+
+    def test_processes(self):
+        with self.settings(PASSWORD_DICTIONARY_PROCESSES=2):
+            validator = validators.DictionaryValidator(
+                dictionary=self.dictionary, index="processes", compiled=self.output
+            )
+            haystacks, index = validator.load()
+        try:
+            self.assertEqual(index.processes, 2)
+            self.assertDecisions(validator, ["Chad+pher9k"], ["SunShine"])
+        finally:
+            index.close()
+
+
+class ConvertPasswordHashesTest(CommandTestCase):
+    command = "convert_password_hashes"
+    source_name = "pwned.txt"
+    output_name = "pwned.hashes"
+    passwords = ["password", "123456", "qwerty", "letmein", "dragon"]
+
+    def get_lines(self):
+        lines = ["%s:42" % sha1(password).hex().upper() for password in self.passwords]
+        return lines + ["%s:1" % sha1("password").hex().upper()]
+
+    def test_convert(self):
+        out = self.call(self.source)
+        self.assertIn("Converted 5 hashes", out)
+        hash_list = HashList(self.output)
+        self.assertEqual(len(hash_list), 5)
+        self.assertEqual(hash_list.algorithm, "sha1")
+        for password in self.passwords:
+            self.assertTrue(hash_list.contains_password(password))
+        self.assertFalse(hash_list.contains_password("Chad+pher9k"))
+        self.assertNotIn(b"\xff" * 20, hash_list)
+
+    def test_plain(self):
+        with open(self.source, "w") as source:
+            source.write("\n".join(self.passwords))
+        self.call(self.source, plain=True)
+        self.assertTrue(HashList(self.output).contains_password("letmein"))
+
+    def test_invalid_hash(self):
+        with open(self.source, "a") as source:
+            source.write("ABCDEF:3\n")
+        self.assertInvalid(self.source)
+
+    def test_many_hashes(self):
+        passwords = ["password%d" % i for i in range(5000)]
+        convert_hashes(passwords, self.output, plain=True)
+        hash_list = HashList(self.output)
+        self.assertEqual(len(hash_list), 5000)
+        for password in passwords[::97]:
+            self.assertTrue(hash_list.contains_password(password))
+        self.assertFalse(hash_list.contains_password("password5000"))
+
+    def test_validation(self):
+        convert_hashes(self.passwords, self.output, plain=True)
+        validator = validators.BreachedPasswordValidator(hashes=self.output)
+        self.assertDecisions(validator, ["Chad+pher9k"], ["letmein"])
+        disabled = validators.BreachedPasswordValidator(hashes="")
+        self.assertDecisions(disabled, ["letmein"])
+
+
+class BuildPasswordBlocklistTest(CommandTestCase):
+    command = "build_password_blocklist"
+    source_name = "blocklist.txt"
+    output_name = "blocklist.bloom"
+    passwords = ["banned%d" % i for i in range(2000)]
+
+    def get_lines(self):
+        return self.passwords
+
+    def test_build(self):
+        out = self.call(self.source, error_rate=0.01)
+        self.assertIn("Added 2000 passwords", out)
+        bloom = BloomFilter(self.output)
+        self.assertEqual(len(bloom), 2000)
+        for password in self.passwords:
+            self.assertIn(password, bloom)
+        others = sum("allowed%d" % i in bloom for i in range(2000))
+        self.assertLess(others, 60)
+        self.assertAlmostEqual(bloom.error_rate, 0.01, places=2)
+
+    def test_invalid_error_rate(self):
+        self.assertInvalid(self.source, error_rate=1.5)
+
+    def test_validation(self):
+        build_filter(["letmein", "Chad+pher9k"], self.output)
+        validator = validators.BlocklistValidator(blocklist=self.output)
+        self.assertDecisions(validator, ["Chad+pher9K"], ["letmein"])
+        self.assertDecisions(validators.BlocklistValidator(blocklist=""), ["letmein"])
+
+
+class BuildPasswordMarkovModelTest(CommandTestCase):
+    command = "build_password_markov_model"
+    source_name = "passwords.txt"
+    output_name = "passwords.markov"
+    passwords = [
+        word + suffix
+        for word in ["password", "dragon", "monkey", "sunshine", "princess", "qwerty"]
+        for suffix in ["", "1", "123", "2020", "!"]
+    ]
+
+    def get_lines(self):
+        return self.passwords * 10
+
+    def test_build(self):
+        out = self.call(self.source, bits=12)
+        self.assertIn("on 300 passwords", out)
+        model = MarkovModel(self.output)
+        self.assertEqual((model.order, model.bits), (3, 12))
+        self.assertLess(model.score("Password1"), model.score("sunmonkey"))
+        self.assertLess(model.score("sunmonkey"), model.score("Chad+pher9k"))
+
+    def test_invalid_bits(self):
+        self.assertInvalid(self.source, bits=4)
+
+    def test_validation(self):
+        build_model(self.passwords, self.output, bits=12)
+        validator = validators.MarkovValidator(model=self.output)
+        self.assertDecisions(validator, ["Chad+pher9k"], ["Dragon2020"])
+        with self.settings(PASSWORD_MARKOV_MIN_BITS=1):
+            self.assertDecisions(validator, ["Dragon2020"])
+        self.assertDecisions(validators.MarkovValidator(model=""), ["Dragon2020"])
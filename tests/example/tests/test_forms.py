@@ -170,6 +170,16 @@ class PasswordPoliciesFormTest(TestCase):
         form = forms.PasswordPoliciesForm(self.user, data)
         self.assertTrue(form.is_valid())
 
+    def test_user_attribute(self):
+        data = {"new_password1": "Chah+pher9k", "new_password2": "Chah+pher9k"}
+        self.user.first_name = "Chah pher9k"
+        form = forms.PasswordPoliciesForm(self.user, data)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form["new_password1"].errors,
+            ["The new password is too similar to the first name."],
+        )
+
 
 class PasswordPoliciesChangeFormTest(TestCase):
     def setUp(self):
@@ -0,0 +1,300 @@
+import random
+import threading
+from unittest import skipUnless
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+
+from password_policies.forms import matching
+from password_policies.forms.dictionaries import CompactStrings
+from password_policies.forms.validators import BaseSimilarityValidator
+
+WORDS = [
+    "password",
+    "letmein",
+    "dragon",
+    "monkey",
+    "sunshine",
+    "princess",
+    "football",
+    "baseball",
+    "welcome",
+    "shadow",
+    "superman",
+    "michael",
+    "qwertyuiopasdfghjklzxcvbnm",
+    "ab",
+    "",
+]
+
+NEEDLES = [
+    "password",
+    "passw0rd",
+    "xpasswordx",
+    "dragon12",
+    "Chad+pher9k",
+    "sunshine!",
+    "suns",
+    "asdfghjk",
+    "qwertz",
+    "zz",
+    "a",
+    "m0nkey",
+]
+
+
+def random_needles(count=200, seed=4013):
+    generator = random.Random(seed)
+    needles = []
+    for _idx in range(count):
+        word = generator.choice(WORDS) or "x"
+        chars = list(word)
+        for _edit in range(generator.randint(0, 3)):
+            position = generator.randint(0, len(chars))
+            operation = generator.choice("ids")
+            letter = generator.choice("abcdefghijklmnopqrstuvwxyz0123456789!")
+            if operation == "i" or not chars:
+                chars.insert(position, letter)
+            elif operation == "d":
+                del chars[min(position, len(chars) - 1)]
+            else:
+                chars[min(position, len(chars) - 1)] = letter
+        needles.append("".join(chars))
+    return needles
+
+
+class SimilarityValidator(BaseSimilarityValidator):
+    code = "similar"
+    message = "similar"
+
+
+def reference_decision(needle, threshold):
+    # The original scan: every haystack, unbounded distance.
+    needle = needle.lower()
+    for haystack in WORDS:
+        distance = matching.fuzzy_substring(needle, haystack)
+        longest = max(len(needle), len(haystack))
+        if (longest - distance) / longest >= threshold:
+            return True
+    return False
+
+
+def decisions(validator, needles):
+    result = []
+    for needle in needles:
+        try:
+            validator(needle)
+        except ValidationError:
+            result.append(True)
+        else:
+            result.append(False)
+    return result
+
+
+class MaxDistanceTest(SimpleTestCase):
+    def test_matches_similarity_formula(self):
+        for threshold in (0.0, 0.5, 0.7, 0.9, 1.0):
+            for longest in range(1, 60):
+                distance = matching.max_distance(longest, threshold)
+                if distance >= 0:
+                    self.assertGreaterEqual((longest - distance) / longest, threshold)
+                if distance < longest:
+                    self.assertLess((longest - distance - 1) / longest, threshold)
+
+
+class IndexEquivalenceTest(SimpleTestCase):
+    def assertSameDecisions(self, index, haystacks=WORDS):
+        needles = NEEDLES + random_needles()
+        indexed = SimilarityValidator(haystacks, index=index)
+        for threshold in (0.5, 0.75, 0.9):
+            expected = [reference_decision(needle, threshold) for needle in needles]
+            with override_settings(PASSWORD_MATCH_THRESHOLD=threshold):
+                self.assertEqual(decisions(indexed, needles), expected)
+        return indexed
+
+    def test_length(self):
+        self.assertSameDecisions(None)
+
+    def test_bktree(self):
+        self.assertSameDecisions("bktree")
+
+    def test_qgram(self):
+        self.assertSameDecisions("qgram")
+
+    @skipUnless(matching.numpy, "NumPy is not installed")
+    def test_numpy(self):
+        self.assertSameDecisions("numpy")
+
+    def test_numpy_fallback(self):
+        numpy, matching.numpy = matching.numpy, None
+        try:
+            self.assertSameDecisions("numpy")
+        finally:
+            matching.numpy = numpy
+
+    def test_processes(self):
+        index = self.assertSameDecisions("processes").load()[1]
+        index.close()
+
+    @override_settings(PASSWORD_SIMILARITY_KERNEL="myers")
+    def test_processes_kernel(self):
+        index = self.assertSameDecisions("processes").load()[1]
+        index.close()
+        self.assertEqual(index.kernel, "myers")
+
+    def test_compact_strings(self):
+        haystacks = CompactStrings(WORDS)
+        for index in ("length", "bktree", "qgram", "numpy"):
+            self.assertSameDecisions(index, haystacks)
+
+    def test_unknown_index(self):
+        validator = SimilarityValidator(WORDS, index="unknown")
+        with self.assertRaises(ValueError):
+            validator("password")
+
+
+class ProcessPoolIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = matching.ProcessPoolIndex(WORDS * 50, processes=2)
+        return super().setUp()
+
+    def tearDown(self):
+        self.index.close()
+        return super().tearDown()
+
+    def test_shards(self):
+        self.assertEqual(len(self.index.shards), 8)
+        self.assertEqual(self.index.shards[0][0], 0)
+        self.assertEqual(self.index.shards[-1][1], len(WORDS) * 50)
+        self.assertEqual(self.index.workers, [0, 0, 0, 0, 1, 1, 1, 1])
+
+    def test_workers_scan_their_shards(self):
+        index = matching.ProcessPoolIndex(["monkey"] * 99 + ["password"], processes=2)
+        try:
+            self.assertEqual(list(index.candidates("passw0rd", 0.8)), ["password"])
+            self.assertEqual(list(index.candidates("monkey", 0.9)), ["monkey"])
+            self.assertEqual([start for start, _pool in index.get_executors()], [0, 50])
+        finally:
+            index.close()
+
+    def test_get_shard(self):
+        haystacks = CompactStrings(WORDS)
+        self.assertEqual(matching.get_shard(WORDS, 2, 4), WORDS[2:4])
+        self.assertEqual(
+            list(matching.get_shard(haystacks, 2, 4)), list(haystacks)[2:4]
+        )
+
+    def test_first_match_cancels_search(self):
+        candidates = list(self.index.candidates("password", 0.9))
+        self.assertEqual(len(candidates), 1)
+        self.assertEqual(list(self.index.candidates("zzzzzzzzzzzzzzz", 0.9)), [])
+        # Every slot was released.
+        self.assertEqual(self.index.slots.qsize(), 8)
+
+    def test_concurrent_searches(self):
+        results = []
+
+        def search():
+            results.append(list(self.index.candidates("password", 0.9)))
+
+        threads = [threading.Thread(target=search) for i in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([len(result) for result in results], [1] * 12)
+
+
+class FuzzySubstringTest(SimpleTestCase):
+    def test_distance(self):
+        self.assertEqual(matching.fuzzy_substring("password", "mypasswords"), 0)
+        self.assertEqual(matching.fuzzy_substring("passw0rd", "password"), 1)
+        self.assertEqual(matching.fuzzy_substring("abc", ""), 3)
+        self.assertEqual(matching.fuzzy_substring("z", "abc"), -1)
+
+    def test_bounded_distance(self):
+        for needle in NEEDLES + random_needles(50):
+            for haystack in WORDS:
+                exact = matching.fuzzy_substring(needle, haystack)
+                for bound in range(0, 4):
+                    bounded = matching.fuzzy_substring(needle, haystack, bound)
+                    if exact <= bound:
+                        self.assertEqual(bounded, exact)
+                    else:
+                        self.assertGreater(bounded, bound)
+
+
+class BKTreeTest(SimpleTestCase):
+    def test_search(self):
+        tree = matching.BKTree(["book", "books", "cake", "boo", "cape", "cart"])
+        self.assertEqual(sorted(tree.search("bool", 1)), ["boo", "book"])
+        self.assertEqual(sorted(tree.search("cake", 0)), ["cake"])
+        self.assertEqual(list(matching.BKTree([]).search("cake", 3)), [])
+
+    def test_same_results_as_scan(self):
+        generator = random.Random(3)
+        words = ["".join(generator.choices("abcd", k=6)) for _idx in range(300)]
+        tree = matching.BKTree(words)
+        for _idx in range(50):
+            needle = "".join(generator.choices("abcd", k=generator.randrange(1, 9)))
+            masks = matching.pattern_masks(needle)
+            for radius in range(4):
+                expected = [
+                    word
+                    for word in words
+                    if matching.myers_distance(masks, len(needle), word) <= radius
+                ]
+                self.assertEqual(sorted(tree.search(needle, radius)), sorted(expected))
+
+    def test_myers_distance(self):
+        for first, second, distance in (
+            ("kitten", "sitting", 3),
+            ("", "abc", 3),
+            ("abc", "", 3),
+            ("flaw", "lawn", 2),
+            ("abc", "abc", 0),
+        ):
+            masks = matching.pattern_masks(first)
+            self.assertEqual(
+                matching.myers_distance(masks, len(first), second), distance
+            )
+
+
+class QGramIndexTest(SimpleTestCase):
+    def test_count_filter(self):
+        index = matching.QGramIndex(["password", "dragon", "monkey"])
+        self.assertEqual(list(index.candidates("passwort", 0.8)), ["password"])
+        self.assertGreater(index.memory_usage(), 0)
+
+
+class MyersSubstringTest(SimpleTestCase):
+    def test_equivalent_to_dp(self):
+        generator = random.Random(1999)
+        alphabet = "abcd1!\xe4\u4e2d"
+        for _idx in range(2000):
+            needle = "".join(
+                generator.choice(alphabet) for _i in range(generator.randint(1, 12))
+            )
+            haystack = "".join(
+                generator.choice(alphabet) for _i in range(generator.randint(0, 20))
+            )
+            self.assertEqual(
+                matching.myers_substring(needle, haystack),
+                matching.fuzzy_substring(needle, haystack),
+                (needle, haystack),
+            )
+
+    def test_long_needles(self):
+        for needle in NEEDLES + random_needles(50):
+            for haystack in WORDS:
+                self.assertEqual(
+                    matching.myers_substring(needle * 5, haystack * 3),
+                    matching.fuzzy_substring(needle * 5, haystack * 3),
+                )
+
+    @override_settings(PASSWORD_SIMILARITY_KERNEL="myers")
+    def test_validator_kernel(self):
+        needles = NEEDLES + random_needles()
+        validator = SimilarityValidator(WORDS)
+        expected = [reference_decision(needle, 0.9) for needle in needles]
+        self.assertEqual(decisions(validator, needles), expected)
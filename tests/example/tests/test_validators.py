@@ -0,0 +1,561 @@
+import math
+import os
+import random
+import tempfile
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import translation
+
+from password_policies.forms import analysis as analysis_module
+from password_policies.forms import dictionaries, validators
+from password_policies.forms.analysis import PasswordAnalysis, Repetition
+from password_policies.forms.guesses import RankedWords
+from password_policies.forms.keyboards import LAYOUTS, longest_walk
+from password_policies.forms.matching import SuffixAutomaton
+from password_policies.forms.normalization import MAX_VARIANTS, get_variants
+from tests.example import lib
+
+
+class PasswordAnalysisTest(TestCase):
+    def test_behaves_like_a_string(self):
+        analysis = PasswordAnalysis("Chad+pher9k")
+        self.assertEqual(analysis, "Chad+pher9k")
+        self.assertEqual(analysis.lower(), "chad+pher9k")
+        self.assertIsInstance(analysis, str)
+
+    def test_single_pass_data(self):
+        analysis = PasswordAnalysis("aaaB1+\u0662")
+        self.assertEqual(analysis.categories["Ll"], 3)
+        self.assertEqual(analysis.categories["Lu"], 1)
+        self.assertEqual(analysis.categories["Nd"], 2)
+        self.assertEqual(analysis.count_categories(["Ll", "Lu"]), 4)
+        self.assertEqual(analysis.frequencies["a"], 3)
+        self.assertEqual(analysis.runs, [3, 1, 1, 1, 1])
+        self.assertEqual(analysis.longest_run, 3)
+        self.assertEqual(analysis.lowercase, "aaab1+\u0662")
+
+    def test_from_value_reuses_analysis(self):
+        analysis = PasswordAnalysis("Chad+pher9k")
+        self.assertIs(PasswordAnalysis.from_value(analysis), analysis)
+        self.assertIsInstance(PasswordAnalysis.from_value("x"), PasswordAnalysis)
+
+    def test_validators_accept_plain_strings(self):
+        validators.validate_letter_count("Chad+pher9k")
+        validators.validate_consecutive_count("Chad+pher9k")
+        with self.assertRaises(ValidationError):
+            validators.validate_consecutive_count("aaaab+9k")
+
+
+class CategoryTableTest(TestCase):
+    def test_table_matches_unicodedata(self):
+        table = analysis_module.get_category_table()
+        self.assertEqual(len(table), 0x10000)
+        for character in "aZ9+ \u0662\xc4\u20ac\u4e2d\u02b0\u0301":
+            self.assertEqual(
+                analysis_module.CATEGORIES[table[ord(character)]],
+                unicodedata.category(character),
+            )
+
+    def test_category_mask(self):
+        analysis = PasswordAnalysis("Ab1\U0001d400")
+        self.assertEqual(analysis.count_mask(analysis_module.category_mask(["Lu"])), 2)
+        self.assertEqual(
+            analysis.count_mask(analysis_module.category_mask(["LC", "Ll"])), 1
+        )
+        self.assertEqual(validators.validate_letter_count.get_category_mask() & 1, 0)
+
+
+class DictionaryValidatorTest(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        with open(handle, "w") as dictionary:
+            dictionary.write("password\ndragon\nsunshine\n")
+        return super().setUp()
+
+    def tearDown(self):
+        os.remove(self.path)
+        return super().tearDown()
+
+    def test_loads_lazily(self):
+        validator = validators.DictionaryValidator(dictionary="/does/not/exist")
+        with self.assertRaises(FileNotFoundError):
+            validator.load()
+
+    def test_validation(self):
+        validator = validators.DictionaryValidator(dictionary=self.path)
+        validator("Chad+pher9k")
+        with self.assertRaises(ValidationError):
+            validator("SunShine")
+        haystacks, index = validator.load()
+        self.assertEqual(list(haystacks), ["dragon", "password", "sunshine"])
+        self.assertIs(validator.load()[1], index)
+
+    def test_exact_match(self):
+        validator = validators.DictionaryValidator(dictionary=self.path)
+        for password in ("Dragon2024!", "2024dragon", "dr-ag0on", "#Sunshine#"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        validator("dragonfly2024")
+        with self.settings(PASSWORD_DICTIONARY_EXACT_MATCH=False):
+            validator("Dragon2024!")
+
+    def test_exact_words(self):
+        validator = validators.DictionaryValidator(words=["Dragon", "sunshine"])
+        haystacks, index = validator.load()
+        self.assertIn("dragon", validator.get_exact_words(haystacks))
+        words = validator.get_exact_words(["Dragon"])
+        self.assertEqual(words, frozenset(["dragon"]))
+        with self.settings(PASSWORD_MATCH_VARIANTS=False):
+            variants = validator.get_variants(PasswordAnalysis("12Ab"))
+            self.assertEqual(variants, ["12ab"])
+            variants = validator.get_variants(PasswordAnalysis("Dr4gon!"))
+            self.assertEqual(sorted(variants), ["dr4gon", "dr4gon!", "drgon"])
+
+    def wait_for_reload(self, validator, before, timeout=10):
+        deadline = time.monotonic() + timeout
+        while validator.load() is before and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return validator.load()
+
+    def test_reload(self):
+        validator = validators.DictionaryValidator(dictionary=self.path)
+        with self.settings(PASSWORD_DICTIONARY_RELOAD_SECONDS=0.001):
+            before = validator.load()
+            validator("Butterfly!")
+            with open(self.path, "a") as dictionary:
+                dictionary.write("butterfly\n")
+            os.utime(self.path, ns=(0, 0))
+            self.assertIsNot(self.wait_for_reload(validator, before), before)
+            with self.assertRaises(ValidationError):
+                validator("Butterfly!")
+
+    def test_reload_failure_keeps_dictionary(self):
+        validator = validators.DictionaryValidator(dictionary=self.path)
+        with self.settings(PASSWORD_DICTIONARY_RELOAD_SECONDS=0.001):
+            before = validator.load()
+            with open(self.path, "wb") as dictionary:
+                dictionary.write(b"\xff\xfe\n")
+            self.assertIs(self.wait_for_reload(validator, before, 0.2), before)
+            with self.assertRaises(ValidationError):
+                validator("SunShine")
+
+    def test_reload_closes_unused_index(self):
+        validator = validators.DictionaryValidator(
+            dictionary=self.path, index="processes"
+        )
+        with self.settings(PASSWORD_DICTIONARY_PROCESSES=1):
+            loaded = validator.acquire()
+            index = loaded[1]
+            index.get_executors()
+            with open(self.path, "a") as dictionary:
+                dictionary.write("butterfly\n")
+            validator.reload(None)
+            self.assertIsNot(validator.load(), loaded)
+            self.assertIsNotNone(index.executors)
+            validator.release(loaded)
+            self.assertIsNone(index.executors)
+            with self.assertRaises(ValidationError):
+                validator("Butterfly!")
+            loaded = validator.load()
+            loaded[1].get_executors()
+            validator.reload(None)
+            self.assertIsNone(loaded[1].executors)
+
+    def test_warm_up(self):
+        validators.warm_up()
+        self.assertIsNotNone(validators.validate_dictionary_words._loaded)
+        self.assertIsNotNone(validators.validate_guesses._loaded)
+
+
+class LanguageDictionaryTest(TestCase):
+    def setUp(self):
+        self.paths = {}
+        for language, words in (("de", "schmetterling"), ("fr", "papillon")):
+            handle, self.paths[language] = tempfile.mkstemp()
+            with open(handle, "w") as dictionary:
+                dictionary.write(words + "\n")
+        return super().setUp()
+
+    def tearDown(self):
+        for path in self.paths.values():
+            os.remove(path)
+        return super().tearDown()
+
+    def test_active_language(self):
+        validator = validators.DictionaryValidator(words=["sunshine"])
+        with self.settings(PASSWORD_DICTIONARIES=self.paths):
+            with translation.override("de-at"):
+                self.assertEqual(validator.get_dictionary(), self.paths["de"])
+                with self.assertRaises(ValidationError):
+                    validator("Schmetterling")
+                with self.assertRaises(ValidationError):
+                    validator("Sunshine")
+                validator("Papillon")
+            with translation.override("fr"):
+                with self.assertRaises(ValidationError):
+                    validator("Papillon")
+            with translation.override("it"):
+                self.assertIsNone(validator.get_dictionary())
+                validator("Papillon")
+                with self.assertRaises(ValidationError):
+                    validator("Sunshine")
+
+    def test_least_recently_used_are_dropped(self):
+        validator = validators.DictionaryValidator()
+        with self.settings(
+            PASSWORD_DICTIONARIES=self.paths, PASSWORD_DICTIONARIES_CACHE_SIZE=1
+        ):
+            with translation.override("de"):
+                loaded = validator.load()
+                self.assertIs(validator.load(), loaded)
+            with translation.override("fr"):
+                validator.load()
+            self.assertEqual(list(validator._languages), [self.paths["fr"]])
+
+    def test_dropped_index_is_closed(self):
+        validator = validators.DictionaryValidator(index="processes")
+        with self.settings(
+            PASSWORD_DICTIONARIES=self.paths,
+            PASSWORD_DICTIONARIES_CACHE_SIZE=1,
+            PASSWORD_DICTIONARY_PROCESSES=1,
+        ):
+            with translation.override("de"):
+                loaded = validator.acquire()
+                loaded[1].get_executors()
+            with translation.override("fr"):
+                index = validator.load()[1]
+                index.get_executors()
+            self.assertIsNotNone(loaded[1].executors)
+            validator.release(loaded)
+            self.assertIsNone(loaded[1].executors)
+            with translation.override("de"):
+                validator.load()
+            self.assertIsNone(index.executors)
+
+
+class CompactStringsTest(TestCase):
+    def test_sequence(self):
+        strings = dictionaries.CompactStrings(
+            ["Dragon", "\xe9t\xe9", "password", "dragon", ""]
+        )
+        self.assertEqual(len(strings), 3)
+        self.assertEqual(list(strings), ["\xe9t\xe9", "dragon", "password"])
+        self.assertEqual(strings[1], "dragon")
+        self.assertIn("\xe9t\xe9", strings)
+        self.assertNotIn("Dragon", strings)
+        self.assertEqual(list(strings.by_length()[6]), ["dragon"])
+        with self.assertRaises(IndexError):
+            strings[3]
+        self.assertEqual(list(dictionaries.CompactStrings()), [])
+
+    def test_search(self):
+        words = ["abcab", "bcxyz", "\xe9t\xe9st", "ab\xe9tc", "zzzzz", "abab"]
+        grams = ["ab", "bc", "ca", "ab"]
+        compact = dictionaries.CompactStrings(words)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "words.dict")
+            dictionaries.compile_dictionary("", words, path)
+            compiled = dictionaries.CompiledDictionary(path)
+            for strings in (compact, compiled):
+                bucket = strings.bucket(5)
+                self.assertEqual(sorted(bucket.search(grams, 4)), ["abcab"])
+                self.assertEqual(sorted(bucket.search(grams, 2)), ["abcab", "ab\xe9tc"])
+                self.assertEqual(list(bucket.search(["t\xe9"], 1)), ["\xe9t\xe9st"])
+                # Grams spanning two words are no matches.
+                self.assertEqual(list(bucket.search(["ba", "cb"], 1)), [])
+            del bucket, compiled
+
+
+class NormalizationTest(TestCase):
+    def test_variants(self):
+        variants = get_variants("p@ssw0rd1")
+        self.assertEqual(variants[0], "p@ssw0rd1")
+        self.assertIn("passwordi", variants)
+        self.assertIn("passwordl", variants)
+        self.assertIn("1dr0wss@p", variants)
+        self.assertIn("p2ssw0rd1", variants)
+        self.assertLessEqual(len(variants), MAX_VARIANTS)
+        self.assertEqual(get_variants("abba"), ["abba"])
+
+    def test_dictionary(self):
+        validator = validators.DictionaryValidator(words=["password"])
+        for password in ("P@ssw0rd", "drowssap", "P@$$W0RD!!", "dr0wss@p2024"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        with self.settings(PASSWORD_MATCH_VARIANTS=False):
+            validator("drowssap")
+
+    def test_common_sequences(self):
+        validator = validators.CommonSequenceValidator(["0123456789"])
+        for password in ("9876543210", "!@#$%^&*()"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        validator("Chad+pher9k")
+        with self.settings(PASSWORD_MATCH_VARIANTS=False):
+            validator("!@#$%^&*()")
+
+
+class CommonSequenceValidatorTest(TestCase):
+    def test_coverage(self):
+        validator = validators.validate_common_sequences
+        for password in ("a", "abcdefgh", "qwertyuiop", "0123456780", "Xabcdefgh1"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        for password in ("Chad+pher9k", "MyDog1234!", "XYabcdefgh$"):
+            validator(password)
+
+    def test_fuzzy(self):
+        validator = validators.validate_common_sequences
+        for password in ("qwertzuiop", "abcdefxhijklmnop", "abcdfghijkl"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+
+    def test_min_run(self):
+        validator = validators.validate_common_sequences
+        with self.settings(PASSWORD_COMMON_SEQUENCES_MIN_RUN=4):
+            with self.assertRaises(ValidationError):
+                validator("MyDog1234!")
+            with self.assertRaises(ValidationError):
+                validator("Horse#poiu")
+            validator("Chad+pher9k")
+
+    def test_no_sequences(self):
+        validator = validators.CommonSequenceValidator([])
+        validator("abcdefgh")
+        with self.settings(PASSWORD_COMMON_SEQUENCES_MIN_RUN=4):
+            validator("abcdefgh")
+
+    def test_automaton(self):
+        automaton = SuffixAutomaton(["abcdef", "0123"])
+        self.assertEqual(automaton.longest_run("xxbcdyy012"), 3)
+        self.assertEqual(automaton.longest_run("zzz"), 0)
+        self.assertEqual(automaton.longest_runs("xxbcdyy012"), [3, 3])
+        self.assertEqual(automaton.longest_runs("zzz"), [0, 0])
+        states = [state for length, state in automaton.matches("bc1")]
+        self.assertEqual([automaton.owners[state] for state in states], [1, 1, 2])
+        self.assertIn("cde", automaton)
+        self.assertNotIn("ce", automaton)
+
+
+class KeyboardWalkValidatorTest(TestCase):
+    def test_walks(self):
+        validator = validators.validate_keyboard_walk
+        for password in ("qwerty", "zaq1@WSX", "qawsedrf", "Horse#poiuy", "1478963"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        for password in ("Chad+pher9k", "correct horse", "1qaz!xyz", "14789"):
+            validator(password)
+
+    def test_words(self):
+        validator = validators.validate_keyboard_walk
+        for password in ("Sweden2024!", "Desert#Rose9", "Redress9!", "werewolf"):
+            validator(password)
+        with self.settings(PASSWORD_KEYBOARD_WALK_MIN_LENGTH=None):
+            validator("qwerty")
+        with self.settings(PASSWORD_KEYBOARD_LAYOUTS=["qwerty"]):
+            validator("azerty")
+
+    def test_layouts(self):
+        walk = LAYOUTS["qwerty"].longest_walk("xx1qazyy")
+        self.assertEqual((walk.start, walk.length, walk.turns), (2, 4, 0))
+        walk = LAYOUTS["qwerty"].longest_walk("qawsedrf")
+        self.assertEqual((walk.turns, walk.bends), (6, 1))
+        self.assertEqual(LAYOUTS["qwerty"].longest_walk("Sweden").bends, 3)
+        self.assertEqual(longest_walk("qsdfgh", ["qwerty", "azerty"]).layout, "azerty")
+        self.assertEqual(longest_walk("\xf6\xe4\xfc+", ["qwertz"]).length, 4)
+        self.assertIsNone(longest_walk("aaaa", ["qwerty"]))
+
+
+class RepeatedSubstringValidatorTest(TestCase):
+    def test_repetition(self):
+        self.assertEqual(
+            analysis_module.find_repetition("abcabcabc!1"), Repetition(0, 9, 3)
+        )
+        self.assertEqual(
+            analysis_module.find_repetition("x12121y"), Repetition(1, 5, 2)
+        )
+        self.assertIsNone(analysis_module.find_repetition("chad+pher9k"))
+        self.assertIsNone(analysis_module.find_repetition(""))
+        self.assertEqual(analysis_module.find_repetition("aabaab"), Repetition(0, 6, 3))
+        self.assertEqual(
+            analysis_module.find_repetition("xy" + "ab" * 2000), Repetition(2, 4000, 2)
+        )
+        analysis = PasswordAnalysis("AbcABCabc")
+        self.assertEqual(analysis.repetition, Repetition(0, 9, 3))
+
+    def test_coverage(self):
+        validator = validators.validate_repeated_substrings
+        for password in ("abcabcabc!1", "Password1password1", "x1x1x1x1"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        for password in ("Chad+pher9k", "abcabc12345!", "correct horse"):
+            validator(password)
+        with self.settings(PASSWORD_MAX_REPEATED_COVERAGE=None):
+            validator("abcabcabc!1")
+        with self.settings(PASSWORD_MAX_REPEATED_COVERAGE=0.9):
+            validator("abcabcabc!1")
+
+
+class EntropyValidatorTest(TestCase):
+    def test_shannon(self):
+        validator = validators.EntropyValidator()
+        self.assertAlmostEqual(validator.entropy("aabb"), 1.0)
+        self.assertAlmostEqual(validator.entropy_ideal(4), 2.0)
+        with self.assertRaises(ValidationError):
+            validator("aaaaaab")
+        validator("Chad+pher9k")
+
+    def test_conditional_random(self):
+        validator = validators.EntropyValidator()
+        validator.model = "conditional"
+        unigram = validators.EntropyValidator()
+        chars = [chr(i) for i in range(32, 127)]
+        generator = random.Random(0)
+        for length in (100, 150, 300):
+            for _ in range(10):
+                password = "".join(generator.choices(chars, k=length))
+                validator(password)
+                self.assertLessEqual(
+                    validator.entropy(password), unigram.entropy(password)
+                )
+
+    def test_models(self):
+        validator = validators.EntropyValidator()
+        validator.model = "pool"
+        self.assertAlmostEqual(validator.entropy("Ab1!"), math.log2(95))
+        with self.assertRaises(ValidationError):
+            validator("qzxjvkwy")
+        validator.model = "conditional"
+        block = "".join(chr(33 + i) for i in range(60))
+        self.assertEqual(validator.entropy(block * 3), 0)
+        with self.assertRaises(ValidationError):
+            validator(block * 3)
+        validators.EntropyValidator()(block * 3)
+        validator.model = "unknown"
+        with self.assertRaises(ValueError):
+            validator("Chad+pher9k")
+
+
+class GuessesValidatorTest(TestCase):
+    def setUp(self):
+        self.validator = validators.GuessesValidator(
+            words=["password", "dragon", "monkey", "correct", "horse", "staple"]
+        )
+        return super().setUp()
+
+    def test_estimate(self):
+        sequence = self.validator.estimate("Dragon1987").sequence
+        self.assertEqual(
+            [(match.pattern, match.start, match.stop) for match in sequence],
+            [("dictionary", 0, 6), ("date", 6, 10)],
+        )
+        patterns = ["walk", "repeat", "date", "bruteforce"]
+        for password, pattern in zip(
+            ["zaq1@WSX", "abcabcabc", "24.12.1999", "Chad+pher9k"], patterns
+        ):
+            sequence = self.validator.estimate(password).sequence
+            self.assertEqual([match.pattern for match in sequence], [pattern])
+        self.assertEqual(self.validator.estimate("").guesses, 0)
+
+    def test_ranks(self):
+        words = RankedWords(["Dragon", "monkey", "dragon", "", "horse"])
+        self.assertEqual(
+            [words.rank(word) for word in ("dragon", "monkey", "horse", "cat")],
+            [1, 2, 3, 0],
+        )
+        self.assertLess(
+            self.validator.estimate("monkey").sequence[0].guesses,
+            self.validator.estimate("Monkey").sequence[0].guesses,
+        )
+
+    def test_guesses(self):
+        for password in ("P@ssw0rd2020", "qwerty123", "dragondragon", "horse1999!"):
+            with self.assertRaises(ValidationError):
+                self.validator(password)
+        for password in ("Chad+pher9k", "correct horse battery staple"):
+            self.validator(password)
+        with self.settings(PASSWORD_MIN_GUESSES=None):
+            self.validator("password")
+        with self.settings(PASSWORD_GUESSES_MAX_MATCHES=1):
+            self.validator("Chad+pher9k")
+
+
+class UserAttributeValidatorTest(TestCase):
+    def setUp(self):
+        self.user = lib.create_user(username="alice", email="alice.smith@example.com")
+        return super().setUp()
+
+    def test_attributes(self):
+        validator = validators.validate_user_attributes
+        for password in ("Alice", "@lice", "AliceSmith", "htims.ecila"):
+            with self.assertRaises(ValidationError):
+                validator(password, self.user)
+        for password in ("Chah+pher9k", "Alice1987!"):
+            validator(password, self.user)
+        validator("alice")
+        with self.settings(PASSWORD_USER_ATTRIBUTES=[]):
+            validator("alice", self.user)
+
+    def test_long_attributes(self):
+        self.user.first_name = "x" * 10000
+        validator = validators.validate_user_attributes
+        self.assertEqual(validator.get_tokens(self.user.first_name), ["x" * 64])
+        tokens = validator.get_tokens(" ".join(["word%d" % i for i in range(100)]))
+        self.assertEqual(len(tokens), validator.max_tokens)
+        words = ["word%d" % i for i in range(validator.max_tokens - 1)]
+        tokens = validator.get_tokens(" ".join(words))
+        self.assertEqual(tokens[1:], words)
+        tokens = validator.get_tokens(" ".join(words + ["extra"]))
+        self.assertEqual(tokens[1:], words)
+        validator("Chah+pher9k", self.user)
+
+
+class RFC4013ValidatorTest(TestCase):
+    def test_flags(self):
+        analysis = PasswordAnalysis("a\u05d0\x00\U000e0001")
+        self.assertEqual(
+            list(analysis.flags),
+            [
+                analysis_module.L_CAT,
+                analysis_module.RAND_AL_CAT,
+                analysis_module.PROHIBITED,
+                analysis_module.PROHIBITED,
+            ],
+        )
+
+    def test_invalid_character(self):
+        validator = validators.validate_invalid_character
+        for password in ("Chah\x00pher9k", "Chah\u200epher9k", "\U000e0001Chah"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        for password in ("Chah+pher9k", "\u05d0\u05d1\u05d2", ""):
+            validator(password)
+        # Validators keep no state between calls.
+        with self.assertRaises(ValidationError):
+            validator("Chah\x00pher9k")
+
+    def test_bidirectional(self):
+        validator = validators.validate_bidirectional
+        for password in ("\u05d0abc\u05d1", "\u05d0\u05d11", "1\u05d0\u05d1"):
+            with self.assertRaises(ValidationError):
+                validator(password)
+        for password in ("Chah+pher9k", "\u05d01\u05d1", "\u0627\u0644\u0639", ""):
+            validator(password)
+
+    def test_threads(self):
+        passwords = ["Chah+pher9k", "\u05d0abc\u05d1", "\u05d01\u05d1", "1\u05d0"] * 50
+
+        def rejected(password):
+            try:
+                validators.validate_bidirectional(password)
+            except ValidationError:
+                return True
+            return False
+
+        expected = [rejected(password) for password in passwords]
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(list(executor.map(rejected, passwords)), expected)